@@ -0,0 +1,100 @@
+"""
+Compares requests per second for controllers that get instantiated on every
+request against the same controllers marked as stateless (reuse_instance), both
+without and with dependency injected services
+
+Usage: python benchmarks/controller_reuse.py [num_requests]
+"""
+import sys
+import time
+
+from flask import Flask
+from flask_unchained import injectable, unchained
+
+from flask_controller_bundle import Controller
+
+
+class GreetingService:
+    def greet(self):
+        return 'index'
+
+
+unchained.register_service('greeting_service', GreetingService())
+
+
+class PerRequestController(Controller):
+    def index(self):
+        return 'index'
+
+
+class PerProcessController(PerRequestController):
+    reuse_instance = 'process'
+
+
+class PerThreadController(PerRequestController):
+    reuse_instance = 'thread'
+
+
+class InjectedPerRequestController(Controller):
+    def __init__(self, greeting_service: GreetingService = injectable):
+        self.greeting_service = greeting_service
+
+    def index(self):
+        return self.greeting_service.greet()
+
+
+class InjectedPerProcessController(InjectedPerRequestController):
+    reuse_instance = 'process'
+
+
+class InjectedPerThreadController(InjectedPerRequestController):
+    reuse_instance = 'thread'
+
+
+CONTROLLERS = [PerRequestController,
+               PerProcessController,
+               PerThreadController,
+               InjectedPerRequestController,
+               InjectedPerProcessController,
+               InjectedPerThreadController]
+
+
+def make_app():
+    app = Flask(__name__)
+    for controller_cls in CONTROLLERS:
+        name = controller_cls.__name__
+        app.add_url_rule(f'/{name}', endpoint=name,
+                         view_func=controller_cls.method_as_view('index'))
+    return app
+
+
+def bench(client, url, num_requests):
+    start = time.perf_counter()
+    for _ in range(num_requests):
+        client.get(url)
+    return num_requests / (time.perf_counter() - start)
+
+
+def bench_view(app, view_func, num_calls):
+    # (views get called from within a request context)
+    with app.test_request_context():
+        start = time.perf_counter()
+        for _ in range(num_calls):
+            view_func()
+        return num_calls / (time.perf_counter() - start)
+
+
+def main(num_requests=5000):
+    app = make_app()
+    client = app.test_client()
+    print(f'{"controller":<32}{"requests/sec":>16}{"view calls/sec":>18}')
+    for controller_cls in CONTROLLERS:
+        name = controller_cls.__name__
+        client.get(f'/{name}')  # warm up
+        rps = bench(client, f'/{name}', num_requests)
+        cps = bench_view(app, app.view_functions[name], num_requests * 20)
+        print(f'{name:<32}{rps:>16,.0f}{cps:>18,.0f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
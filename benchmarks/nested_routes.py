@@ -0,0 +1,93 @@
+"""
+Compares flattening deeply nested route trees (nested lists, and nested
+``prefix`` / ``include`` calls) with reduce_routes against the previous,
+recursive implementation
+
+Usage: python benchmarks/nested_routes.py [depth] [routes_per_level]
+"""
+import sys
+import time
+import types
+
+from flask_controller_bundle import routes as routes_module
+from flask_controller_bundle.route import Route
+from flask_controller_bundle.routes import func, include, prefix, reduce_routes
+
+
+def recursive_reduce_routes(routes):
+    if not routes:
+        return
+
+    for route in routes:
+        if isinstance(route, Route):
+            yield route
+        else:
+            yield from recursive_reduce_routes(route)
+
+
+def view():
+    pass
+
+
+def nested_lists(depth, routes_per_level):
+    routes = []
+    for level in range(depth):
+        routes = [func(f'/{level}-{i}', view, endpoint=f'{level}.{i}')
+                  for i in range(routes_per_level)] + [routes]
+    return routes
+
+
+def nested_prefixes(depth, routes_per_level):
+    routes = []
+    for level in range(depth):
+        routes = prefix(f'/{level}', [
+            func(f'/{i}', view, endpoint=f'{level}.{i}')
+            for i in range(routes_per_level)] + [routes])
+    return [routes]
+
+
+def nested_includes(depth, routes_per_level):
+    previous = None
+    for level in range(depth):
+        module = types.ModuleType(f'bench_nested_routes_{level}')
+        module.routes = [func(f'/{level}-{i}', view, endpoint=f'{level}.{i}')
+                         for i in range(routes_per_level)]
+        if previous:
+            module.routes.append(prefix(f'/{level}', [include(previous)]))
+        sys.modules[module.__name__] = module
+        previous = module.__name__
+    return [include(previous)]
+
+
+def bench(reduce_fn, make_routes, depth, routes_per_level):
+    # prefix, include, etc use reduce_routes internally too
+    routes_module.reduce_routes = reduce_fn
+    routes_module._module_routes_cache.clear()
+    try:
+        routes = make_routes(depth, routes_per_level)
+        start = time.perf_counter()
+        count = sum(1 for _ in reduce_fn(routes))
+    except RecursionError:
+        return None, None
+    finally:
+        routes_module.reduce_routes = reduce_routes
+    return count, (time.perf_counter() - start) * 1000
+
+
+def main(depth=150, routes_per_level=5):
+    print(f'depth {depth:,}, {routes_per_level} routes per level')
+    print(f'{"tree":<16}{"reduce_routes":<16}{"routes":>8}{"ms":>10}')
+    for name, make_routes in [('nested lists', nested_lists),
+                              ('nested prefix', nested_prefixes),
+                              ('nested include', nested_includes)]:
+        for impl, reduce_fn in [('recursive', recursive_reduce_routes),
+                                ('iterative', reduce_routes)]:
+            count, ms = bench(reduce_fn, make_routes, depth, routes_per_level)
+            if count is None:
+                print(f'{name:<16}{impl:<16}{"RecursionError":>18}')
+            else:
+                print(f'{name:<16}{impl:<16}{count:>8,}{ms:>10,.1f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,90 @@
+"""
+Measures the app-factory cost of resolving module names and registering the
+routes of a synthetic app with many view functions (spread across many
+modules), comparing ``inspect.getmodule`` against the cached ``__module__``
+lookup used by Route.module_name
+
+Also measures detecting conflicting routes (see rule_trie), which runs on every
+app startup
+
+Usage: python benchmarks/route_startup.py [num_routes] [num_modules]
+"""
+import inspect
+import sys
+import time
+import types
+
+from flask import Flask
+
+from flask_controller_bundle.route import Route
+from flask_controller_bundle.rule_trie import find_route_conflicts
+
+
+def make_routes(num_routes, num_modules):
+    modules = []
+    for i in range(num_modules):
+        module = types.ModuleType(f'bench_app_{i}.views')
+        sys.modules[module.__name__] = module
+        modules.append(module)
+
+    routes = []
+    for i in range(num_routes):
+        module = modules[i % num_modules]
+        exec(f'def view_{i}():\n    return "{i}"', module.__dict__)
+        routes.append(Route(f'/view-{i}', getattr(module, f'view_{i}')))
+    return routes
+
+
+def bench(fn, routes):
+    start = time.perf_counter()
+    fn(routes)
+    return (time.perf_counter() - start) * 1000
+
+
+def getmodule_names(routes):
+    for _ in range(3):  # the hook resolves module names more than once
+        for route in routes:
+            inspect.getmodule(route.view_func).__name__
+
+
+def cached_module_names(routes):
+    for _ in range(3):
+        for route in routes:
+            route.module_name
+
+
+def freeze(routes):
+    for route in routes:
+        route.freeze()
+
+
+def find_conflicts(routes):
+    find_route_conflicts(routes)
+
+
+def register(routes):
+    app = Flask(__name__)
+    for route in routes:
+        route = route.freeze()
+        app.add_url_rule(route.full_rule,
+                         endpoint=route.endpoint,
+                         methods=route.methods,
+                         view_func=route.view_func)
+
+
+def main(num_routes=5000, num_modules=250):
+    print(f'{num_routes:,} routes across {num_modules:,} modules')
+    print(f'{"phase":<28}{"ms":>10}')
+    for name, fn in [('inspect.getmodule', getmodule_names),
+                     ('cached __module__', cached_module_names),
+                     ('freeze', freeze),
+                     ('find conflicts', find_conflicts),
+                     ('freeze + add_url_rule', register)]:
+        routes = make_routes(num_routes, num_modules)
+        if fn is find_conflicts:
+            routes = [route.freeze() for route in routes]
+        print(f'{name:<28}{bench(fn, routes):>10,.1f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
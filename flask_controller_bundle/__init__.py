@@ -11,6 +11,8 @@
 __version__ = '0.2.1'
 
 
+import os
+
 from flask import Flask
 from flask_unchained import Bundle
 
@@ -21,10 +23,12 @@ from .decorators import no_route, route
 from .resource import Resource
 from .routes import (
     controller, func, get, include, patch, post, prefix, put, resource, rule)
-from .utils import redirect, url_for
+from .utils import redirect, url_for, url_for_many
 
 
 class FlaskControllerBundle(Bundle):
+    command_group_names = ['controller']
+
     @classmethod
     def before_init_app(cls, app: Flask):
         from .template_loader import (UnchainedJinjaEnvironment,
@@ -33,3 +37,21 @@ class FlaskControllerBundle(Bundle):
         app.jinja_options = {**app.jinja_options,
                              'loader': UnchainedJinjaLoader(app)}
         app.jinja_env.globals['url_for'] = url_for
+
+    @classmethod
+    def after_init_app(cls, app: Flask):
+        from .constants import REDIRECT_ALLOWLIST_EXTENSION_NAME
+        from .utils import build_redirect_allowlist
+        app.extensions[REDIRECT_ALLOWLIST_EXTENSION_NAME] = \
+            build_redirect_allowlist(app.config)
+
+        from .template_loader import (UnchainedBytecodeCache,
+                                      UnchainedJinjaLoader)
+        if isinstance(app.jinja_env.loader, UnchainedJinjaLoader):
+            app.jinja_env.loader.build_index()
+
+        bytecode_cache_dir = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            app.jinja_env.bytecode_cache = \
+                UnchainedBytecodeCache(bytecode_cache_dir)
@@ -1,6 +1,10 @@
 ABSTRACT_ATTR = '__abstract__'
+ASYNC_METHODS_ATTR = '__fcb_async_method_names__'
 CONTROLLER_ROUTES_ATTR = '__fcb_controller_routes__'
+DECORATED_METHODS_ATTR = '__fcb_decorated_methods__'
 FN_ROUTES_ATTR = '__fcb_fn_routes__'
+NAME_CACHE_ATTR = '__fcb_name_cache__'
 NO_ROUTES_ATTR = '__fcb_no_routes__'
 NOT_VIEWS_ATTR = '__fcb_not_views_method_names__'
 REMOVE_SUFFIXES_ATTR = '__fcb_remove_suffixes__'
+REUSED_INSTANCES_ATTR = '__fcb_reused_instances__'
@@ -0,0 +1,86 @@
+import click
+import json
+import os
+
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_unchained.commands.utils import print_table
+from typing import *
+
+from .template_loader import (
+    TEMPLATE_EXTENSIONS, UnchainedBytecodeCache, precompile_templates)
+from .timing import get_startup_timings
+
+
+@click.group()
+def controller():
+    """Flask Controller Bundle commands"""
+
+
+@controller.command()
+@click.option('--limit', default=10, show_default=True,
+              help='How many of the slowest bundles/modules to list.')
+@click.option('--json', 'as_json', is_flag=True, default=False,
+              help='Output the timings as JSON (eg for tracking in CI).')
+@with_appcontext
+def timings(limit: int, as_json: bool):
+    """Show the startup timings of the bundle's hooks"""
+    startup_timings = get_startup_timings(current_app)
+    if as_json:
+        click.echo(json.dumps(startup_timings.as_dict(limit), indent=2))
+        return
+
+    if not startup_timings.phases:
+        click.echo('No startup timings were recorded.')
+        return
+
+    click.echo('=' * 80)
+    click.echo(f'Startup Timings (total: {_ms(startup_timings.total)})')
+    click.echo('=' * 80)
+    print_table(('Hook', 'Phase', 'Time'),
+                [(hook, phase, _ms(seconds)) for (hook, phase), seconds
+                 in startup_timings.phases.items()],
+                ['<', '<', '>'])
+
+    slowest = startup_timings.slowest(limit)
+    if slowest:
+        click.echo('')
+        click.echo('Slowest Bundles and Modules')
+        click.echo('=' * 80)
+        print_table(('Hook', 'Phase', 'Bundle/Module', 'Time'),
+                    [(hook, phase, key, _ms(seconds))
+                     for hook, phase, key, seconds in slowest],
+                    ['<', '<', '<', '>'])
+
+
+@controller.command('precompile-templates')
+@click.option('--output', type=click.Path(file_okay=False), default=None,
+              help='The bytecode cache directory to write to. '
+                   '[default: TEMPLATE_BYTECODE_CACHE_DIR]')
+@click.option('--extension', 'extensions', multiple=True, type=str,
+              default=list(TEMPLATE_EXTENSIONS), show_default=True,
+              help='The file extensions of templates (can be given more than '
+                   'once). Other files in template folders get skipped.')
+@with_appcontext
+def precompile_templates_command(output: str, extensions: Tuple[str, ...]):
+    """Compile all templates (and their overrides) into the bytecode cache"""
+    environment = current_app.jinja_env
+    if output:
+        os.makedirs(output, exist_ok=True)
+        environment.bytecode_cache = UnchainedBytecodeCache(output)
+    elif environment.bytecode_cache is None:
+        click.echo('WARNING: No TEMPLATE_BYTECODE_CACHE_DIR is configured (and '
+                   'no --output was given); only checking the templates.',
+                   err=True)
+
+    compiled, errors = precompile_templates(environment, extensions)
+    for name, error in errors:
+        click.echo(f'{name}: {error.__class__.__name__}: {error}', err=True)
+    click.echo(f'Compiled {len(compiled)} templates.')
+    if errors:
+        raise click.ClickException(f'{len(errors)} templates failed to '
+                                   f'compile.')
+
+
+def _ms(seconds: float) -> str:
+    return f'{seconds * 1000:,.1f}ms'
@@ -9,4 +9,11 @@ ALL_METHODS = {CREATE, DELETE, GET, LIST, PATCH, PUT}
 INDEX_METHODS = {CREATE, LIST}
 MEMBER_METHODS = {DELETE, GET, PATCH, PUT}
 
+# the key for this bundle's route store in app.extensions
+EXTENSION_NAME = 'flask_controller_bundle'
+REDIRECT_ALLOWLIST_EXTENSION_NAME = 'flask_controller_bundle.redirect_allowlist'
+TIMINGS_EXTENSION_NAME = 'flask_controller_bundle.timings'
+TEMPLATE_EXPLANATIONS_EXTENSION_NAME = \
+    'flask_controller_bundle.template_explanations'
+
 _missing = type('_missing', (), {'__bool__': lambda self: False})()
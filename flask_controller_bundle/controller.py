@@ -1,13 +1,29 @@
+import asyncio
 import functools
+import inspect
 import os
+import threading
+import weakref
 
-from flask import (after_this_request, current_app as app, flash, jsonify,
-                   render_template, request)
+from flask import (Flask, after_this_request, current_app as app, flash,
+                   jsonify, render_template, request)
 from http import HTTPStatus
 
+from .attr_constants import (ASYNC_METHODS_ATTR, DECORATED_METHODS_ATTR,
+                             REUSED_INSTANCES_ATTR)
 from .metaclasses import ControllerMeta
 from .utils import controller_name, redirect
 
+try:
+    from flask.globals import _cv_app  # Flask 2.2+
+except ImportError:
+    from flask.globals import _app_ctx_stack
+    _cv_app = None
+
+# Flask 2.0+ runs async view functions (older versions would return the
+# coroutine without ever awaiting it)
+FLASK_RUNS_ASYNC_VIEWS = hasattr(Flask, 'ensure_sync')
+
 
 class TemplateFolderDescriptor:
     def __get__(self, instance, cls):
@@ -24,6 +40,25 @@ class Controller(metaclass=ControllerMeta):
     decorators = None
     url_prefix = None
 
+    reuse_instance = None
+    """
+    set to ``'process'`` or ``'thread'`` to mark this controller as stateless,
+    in which case a single instance gets created (lazily, on the first request)
+    per app and per process or per thread respectively, and reused across
+    requests (by all of its view methods with the same class args)
+    """
+
+    cache_decorators = False
+    """
+    whether or not to build the decorated view method chain only once (on the
+    first request to each method), instead of calling :meth:`get_decorators`
+    and :meth:`apply_decorators` on every request. leave this disabled for
+    controllers that compute their decorators dynamically per-request.
+
+    NOTE: when enabled, decorators get applied to the *unbound* method, so the
+    controller instance gets passed to them as the first positional argument
+    """
+
     def flash(self, msg, category=None):
         if not request.is_json and app.config.get('FLASH_MESSAGES', True):
             flash(msg, category)
@@ -48,9 +83,32 @@ class Controller(metaclass=ControllerMeta):
         # - we apply decorators later, so they get called when the view does
         # - we also apply them in reverse, so that they get applied in the
         #   logical top-to-bottom order as declared in controllers
-        def view_func(*args, **kwargs):
-            self = view_func.view_class(*class_args, **class_kwargs)
-            return self.dispatch_request(method_name, *args, **kwargs)
+        # - stateless controllers can opt-in to reusing their instances
+        # - async methods get an async view function when Flask supports them
+        #   (so that Flask's async support will run them), otherwise (and if
+        #   sync methods end up returning an awaitable, eg from an async
+        #   decorator) we run the awaitable to completion ourselves
+        get_instance = _make_instance_getter(
+            cls,
+            lambda: view_func.view_class(*class_args, **class_kwargs),
+            cls.reuse_instance,
+            key=(class_args, tuple(sorted(class_kwargs.items()))))
+
+        if (FLASK_RUNS_ASYNC_VIEWS
+                and method_name in getattr(cls, ASYNC_METHODS_ATTR, ())):
+            async def view_func(*args, **kwargs):
+                self = get_instance()
+                rv = self.dispatch_request(method_name, *args, **kwargs)
+                if inspect.isawaitable(rv):
+                    rv = await rv
+                return rv
+        else:
+            def view_func(*args, **kwargs):
+                self = get_instance()
+                rv = self.dispatch_request(method_name, *args, **kwargs)
+                if inspect.isawaitable(rv):
+                    return _run_awaitable(rv)
+                return rv
 
         wrapper_assignments = (set(functools.WRAPPER_ASSIGNMENTS)
                                .difference({'__qualname__'}))
@@ -60,14 +118,40 @@ class Controller(metaclass=ControllerMeta):
         return view_func
 
     def dispatch_request(self, method_name, *view_args, **view_kwargs):
+        if self.cache_decorators:
+            method = self.get_decorated_method(method_name)
+            return method(self, *view_args, **view_kwargs)
+
         decorators = self.get_decorators(method_name)
         method = self.apply_decorators(getattr(self, method_name), decorators)
         return method(*view_args, **view_kwargs)
 
+    def get_decorated_method(self, method_name):
+        """
+        Returns the (unbound) view method with its decorators applied, building
+        and caching it on the controller class the first time it's requested
+        """
+        cache = getattr(self.__class__, DECORATED_METHODS_ATTR)
+        method = cache.get(method_name)
+        if method is None:
+            decorators = self.get_decorators(method_name)
+            method = self.apply_decorators(getattr(self.__class__, method_name),
+                                           decorators)
+            cache[method_name] = method
+        return method
+
     def get_decorators(self, method_name):
         return self.decorators or []
 
     def apply_decorators(self, view_func, decorators):
+        """
+        Applies decorators to view_func in their declared (top-to-bottom) order.
+
+        Decorators can be sync or async. If any of them (or the view function
+        itself) is async, the returned function will return an awaitable, so
+        decorators that post-process the return value of async view functions
+        should themselves be async.
+        """
         if not decorators:
             return view_func
 
@@ -85,3 +169,146 @@ class Controller(metaclass=ControllerMeta):
 
     def errors(self, errors, code=HTTPStatus.BAD_REQUEST, key='errors', headers=None):
         return jsonify({key: errors}), code, headers or {}
+
+
+def _run_awaitable(awaitable):
+    # Flask 2.0+ knows how to run coroutines from sync code (using asgiref)
+    async_to_sync = getattr(app, 'async_to_sync', None)
+    if async_to_sync is not None:
+        async def run():
+            return await awaitable
+        return async_to_sync(run)()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()
+
+
+def _make_instance_getter(cls, factory, reuse_instance=None, key=()):
+    """
+    Returns a function returning the controller instance to dispatch a request
+    to: a new one every time, or for stateless controllers, the one instance
+    of cls (per app, and per process or thread) created with the class args
+    identified by key
+    """
+    if not reuse_instance:
+        return factory
+
+    if reuse_instance not in {'process', 'thread'}:
+        raise ValueError(f'reuse_instance must be one of None, "process", or '
+                         f'"thread" (got {reuse_instance!r})')
+
+    try:
+        hash(key)
+    except TypeError:
+        key = object()  # unhashable class args: only reused by this view
+
+    # the last (app, instance) pair gets memoized by the view (per thread, for
+    # 'thread'), so that reusing an instance only costs an app context lookup
+    instances = _get_reused_instances(cls)
+    if reuse_instance == 'thread':
+        last = threading.local()
+
+        def get_thread_instance():
+            owner = _get_instance_owner()
+            try:
+                last_owner, instance = last.pair
+            except AttributeError:
+                last_owner = instance = None
+            if last_owner is not owner:
+                instance = instances.get_thread_instance(owner, key, factory)
+                last.pair = (owner, instance)
+            return instance
+        return get_thread_instance
+
+    last_pair = (None, None)
+
+    def get_process_instance():
+        nonlocal last_pair
+        owner = _get_instance_owner()
+        last_owner, instance = last_pair
+        if last_owner is not owner:
+            instance = instances.get_process_instance(owner, key, factory)
+            last_pair = (owner, instance)
+        return instance
+    return get_process_instance
+
+
+class _NoApp:
+    """the owner of instances created outside of an app context"""
+
+
+_no_app = _NoApp()
+_reused_instances_lock = threading.Lock()
+
+
+class _ReusedInstances:
+    """
+    The reused instances of a stateless controller class, per app (and per
+    thread, for ``reuse_instance = 'thread'``), keyed by their class args
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process = weakref.WeakKeyDictionary()
+        self._thread = threading.local()
+
+    def get_process_instance(self, owner, key, factory):
+        instances = self._process.get(owner)
+        if instances is None or key not in instances:
+            with self._lock:
+                instances = self._process.setdefault(owner, {})
+                if key not in instances:
+                    instances[key] = factory()
+        return instances[key]
+
+    def get_thread_instance(self, owner, key, factory):
+        try:
+            per_app = self._thread.instances
+        except AttributeError:
+            per_app = self._thread.instances = weakref.WeakKeyDictionary()
+
+        instances = per_app.setdefault(owner, {})
+        try:
+            return instances[key]
+        except KeyError:
+            instance = instances[key] = factory()
+            return instance
+
+
+def _get_reused_instances(cls) -> _ReusedInstances:
+    instances = cls.__dict__.get(REUSED_INSTANCES_ATTR)
+    if instances is None:
+        with _reused_instances_lock:
+            instances = cls.__dict__.get(REUSED_INSTANCES_ATTR)
+            if instances is None:
+                instances = _ReusedInstances()
+                setattr(cls, REUSED_INSTANCES_ATTR, instances)
+    return instances
+
+
+def _get_instance_owner():
+    ctx = _get_app_ctx()
+    return ctx.app if ctx is not None else _no_app
+
+
+if _cv_app is not None:
+    def _get_app_ctx():
+        return _cv_app.get(None)
+elif hasattr(type(_app_ctx_stack._local), '__ident_func__'):
+    # (werkzeug < 2.0 only gets to Local.__getattr__ after a failed attribute
+    # lookup, which makes up most of the cost of _app_ctx_stack.top)
+    _app_ctx_local = _app_ctx_stack._local
+    _get_local_attr = object.__getattribute__
+
+    def _get_app_ctx():
+        local = _app_ctx_local
+        ident = _get_local_attr(local, '__ident_func__')()
+        try:
+            return _get_local_attr(local, '__storage__')[ident]['stack'][-1]
+        except (KeyError, IndexError):
+            return None
+else:
+    def _get_app_ctx():
+        return _app_ctx_stack.top
@@ -1,17 +1,22 @@
 from collections import defaultdict
 from typing import *
 
-from ..route import Route
+from ..route import FinalRoute
 from .register_blueprints_hook import RegisterBlueprintsHook
 from .register_routes_hook import RegisterRoutesHook
 from .register_bundle_template_folders import RegisterBundleTemplateFoldersHook
 
 EndpointName = str
 BundleName = str
+MethodName = str
 
 
 class Store:
     def __init__(self):
-        self.endpoints: Dict[EndpointName, Route] = {}
-        self.bundle_routes: Dict[BundleName, List[Route]] = defaultdict(list)
-        self.other_routes: List[Route] = []
+        self.endpoints: Dict[EndpointName, FinalRoute] = {}
+        self.bundle_routes: Dict[BundleName, List[FinalRoute]] = defaultdict(list)
+        self.other_routes: List[FinalRoute] = []
+
+        # lookup of (controller class, method name) -> endpoint, for url_for
+        self.controller_endpoints: Dict[Tuple[type, MethodName],
+                                        EndpointName] = {}
@@ -2,7 +2,10 @@ from flask import Blueprint, Flask
 from flask_unchained import AppFactoryHook, Bundle
 from typing import *
 
-from ..utils import get_babel_bundle
+from ..manifest import (
+    ManifestError, load_manifest_blueprints, write_manifest_blueprints)
+from ..timing import get_startup_timings
+from ..utils import get_babel_bundle, parallel_map
 
 
 class RegisterBlueprintsHook(AppFactoryHook):
@@ -17,27 +20,80 @@ class RegisterBlueprintsHook(AppFactoryHook):
 
     _limit_discovery_to_local_declarations = False
 
+    discovery_workers = None
+    """
+    whether or not to import and inspect bundles' views modules on a thread
+    pool (if an int, the number of threads to use). set from the app config
+    option ``PARALLEL_BUNDLE_DISCOVERY``
+    """
+
+    timings = None
+    """
+    the :class:`~flask_controller_bundle.timing.StartupTimings` to record
+    per-bundle collection times to (set by run_hook)
+    """
+
     def run_hook(self, app: Flask, bundles: List[Type[Bundle]]):
         self.babel_bundle = get_babel_bundle(bundles)
-        super().run_hook(app, bundles)
+        self.discovery_workers = app.config.get('PARALLEL_BUNDLE_DISCOVERY')
+        self.timings = get_startup_timings(app)
+
+        # with lazy views, the blueprints come from the routes manifest too, so
+        # that the views modules don't need to get imported to find them
+        manifest_path = (app.config.get('ROUTES_MANIFEST_LAZY_VIEWS')
+                         and app.config.get('ROUTES_MANIFEST'))
+        if manifest_path:
+            with self.timings.timed(self.name, 'load_manifest'):
+                blueprints = load_manifest_blueprints(manifest_path,
+                                                      environment=app.env)
+            if blueprints is not None:
+                self.process_objects(app, blueprints)
+                return
+
+        blueprints = self.collect_from_bundles(bundles)
+        self.process_objects(app, blueprints)
+
+        if manifest_path:
+            self.write_manifest(manifest_path, blueprints, environment=app.env)
 
     def process_objects(self, app: Flask, blueprints: List[Blueprint]):
+        timings = get_startup_timings(app)
         for blueprint in reversed(blueprints):
             # rstrip '/' off url_prefix because views should be declaring their
             # routes beginning with '/', and if url_prefix ends with '/', routes
             # will end up looking like '/prefix//endpoint', which is no good
             url_prefix = (blueprint.url_prefix or '').rstrip('/')
-            app.register_blueprint(blueprint, url_prefix=url_prefix)
+            with timings.timed(self.name, 'register_blueprint',
+                               blueprint.import_name):
+                app.register_blueprint(blueprint, url_prefix=url_prefix)
             self.log_action(blueprint)
 
             if self.babel_bundle:
-                self.babel_bundle.register_blueprint(app, blueprint)
+                with timings.timed(self.name, 'babel', blueprint.import_name):
+                    self.babel_bundle.register_blueprint(app, blueprint)
+
+    def write_manifest(self, path: str, blueprints: List[Blueprint],
+                       environment: Optional[str] = None):
+        try:
+            write_manifest_blueprints(path, blueprints, environment)
+        except (ManifestError, OSError) as e:
+            from warnings import warn
+            warn(f'WARNING: Could not add the blueprints to the routes '
+                 f'manifest at {path}: {e}')
 
     def collect_from_bundles(self, bundles: List[Type[Bundle]],
                              ) -> List[Blueprint]:
+        def collect(bundle):
+            if self.timings is None:
+                return list(self.collect_from_bundle(bundle))
+            with self.timings.timed(self.name, 'collect', bundle.name):
+                return list(self.collect_from_bundle(bundle))
+
+        # blueprints get merged in bundle order, even if collected in parallel
         objects = []
-        for bundle in bundles:
-            objects += self.collect_from_bundle(bundle)
+        for bundle_blueprints in parallel_map(collect, bundles,
+                                              self.discovery_workers):
+            objects += bundle_blueprints
         return objects
 
     def collect_from_bundle(self, bundle: Type[Bundle]) -> Iterable[Blueprint]:
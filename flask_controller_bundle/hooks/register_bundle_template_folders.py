@@ -4,7 +4,8 @@ from flask.helpers import _endpoint_from_view_func
 from flask_unchained import AppFactoryHook, Bundle
 from typing import List
 
-from ..utils import get_babel_bundle
+from ..timing import get_startup_timings
+from ..utils import get_babel_bundle, has_views
 
 
 # FIXME test template resolution order when this is used in combination with
@@ -89,12 +90,13 @@ class RegisterBundleTemplateFoldersHook(AppFactoryHook):
 
     def run_hook(self, app: Flask, bundles: List[Bundle]):
         self.babel_bundle = get_babel_bundle(bundles)
+        timings = get_startup_timings(app)
 
         for bundle_ in reversed(bundles):
             for bundle in bundle_.iter_class_hierarchy(reverse=False):
                 if (bundle.template_folder
                         or bundle.static_folder
-                        or bundle.has_views()):
+                        or has_views(bundle)):
                     bp = BundleBlueprint(bundle)
                     for route in self.store.bundle_routes.get(bundle.name, []):
                         bp.add_url_rule(route.full_rule,
@@ -103,8 +105,13 @@ class RegisterBundleTemplateFoldersHook(AppFactoryHook):
                                         methods=route.methods,
                                         view_func=route.view_func,
                                         **route.rule_options)
-                    app.register_blueprint(bp)
+
+                    # (the bundle's routes get added to the app here)
+                    with timings.timed(self.name, 'register_blueprint',
+                                       bundle.name):
+                        app.register_blueprint(bp)
                     self.log_action(bp)
 
                     if self.babel_bundle:
-                        self.babel_bundle.register_blueprint(app, bp)
+                        with timings.timed(self.name, 'babel', bundle.name):
+                            self.babel_bundle.register_blueprint(app, bp)
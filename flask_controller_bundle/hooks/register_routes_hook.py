@@ -1,13 +1,21 @@
 import importlib
 import inspect
+import sys
+import time
 
 from flask import Flask
 from flask_unchained import AppFactoryHook, AppBundle, Bundle
 from typing import *
 
 from ..attr_constants import CONTROLLER_ROUTES_ATTR, FN_ROUTES_ATTR
-from ..routes import reduce_routes, _normalize_controller_routes, include
-from ..utils import get_babel_bundle
+from ..constants import EXTENSION_NAME
+from ..manifest import ManifestError, load_manifest, write_manifest
+from ..route import FinalRoute, filter_routes_to_register
+from ..rule_trie import find_route_conflicts, format_route_conflict
+from ..routes import (
+    reduce_routes, include, _get_module_routes, _normalize_controller_routes)
+from ..timing import get_startup_timings, recording_module_timings
+from ..utils import get_babel_bundle, has_views
 
 
 class RegisterRoutesHook(AppFactoryHook):
@@ -15,6 +23,9 @@ class RegisterRoutesHook(AppFactoryHook):
     name = 'routes'
     run_before = ['blueprints', 'bundle_template_folders']
 
+    has_route_predicates = False
+    """whether any of the processed routes had a callable ``only_if``"""
+
     action_category = 'routes'
     action_table_columns = ['rule', 'endpoint', 'view']
     action_table_converter = lambda route: [route.full_rule,
@@ -22,49 +33,97 @@ class RegisterRoutesHook(AppFactoryHook):
                                             route.full_name]
 
     def run_hook(self, app: Flask, bundles):
-        app_bundle = bundles[-1]
-        routes_module = self.import_bundle_module(app_bundle)
-        routes = (self.get_explicit_routes(app_bundle) if routes_module
-                  else self.collect_from_bundle(app_bundle))
         self.babel_bundle = get_babel_bundle(bundles)
+        timings = get_startup_timings(app)
+
+        manifest_path = app.config.get('ROUTES_MANIFEST')
+        if manifest_path:
+            with timings.timed(self.name, 'load_manifest'):
+                routes = load_manifest(
+                    manifest_path, app.config.get('ROUTES_MANIFEST_LAZY_VIEWS'),
+                    environment=app.env)
+            if routes is not None:
+                self.register_routes(app, routes)
+                return
+
+        app_bundle = bundles[-1]
+        with timings.timed(self.name, 'import', app_bundle.name):
+            routes_module = self.import_bundle_module(app_bundle)
+            routes = routes_module and self.get_explicit_routes(app_bundle)
+
+        if routes_module:
+            # the top-level routes (typically one include per bundle) can
+            # optionally get imported and reduced in parallel. the time spent
+            # per (included) module gets recorded by include and
+            # _get_module_routes
+            with recording_module_timings(timings, self.name):
+                routes = _get_module_routes(
+                    routes_module.__name__, 'routes', routes,
+                    workers=app.config.get('PARALLEL_BUNDLE_DISCOVERY'))
+        else:
+            with timings.timed(self.name, 'collect', app_bundle.name):
+                routes = list(self.collect_from_bundle(app_bundle))
         self.process_objects(app, routes)
 
-    def process_objects(self, app: Flask, routes):
-        for route in reduce_routes(routes):
-            # FIXME maybe validate routes first? (eg for duplicates?)
-            # Flask doesn't complain; it will match the first route found,
-            # but maybe we should at least warn the user?
-            if route.should_register(app):
-                self.store.endpoints[route.endpoint] = route
+        if manifest_path:
+            self.write_manifest(manifest_path, bundles, environment=app.env)
 
-        bundle_names = [(b.name, [cb.module_name for cb in b.iter_class_hierarchy()
-                                  if cb.has_views()])
-                        for b in app.unchained.BUNDLES]
+    def process_objects(self, app: Flask, routes):
+        timings = get_startup_timings(app)
+        with timings.timed(self.name, 'normalize'):
+            routes = list(reduce_routes(routes))
+        with timings.timed(self.name, 'should_register'):
+            self.has_route_predicates = any(callable(route.only_if)
+                                            for route in routes)
+            routes = filter_routes_to_register(routes, app)
+        with timings.timed(self.name, 'normalize'):
+            routes = [route.freeze() for route in routes]
+        with timings.timed(self.name, 'validate'):
+            self.validate_routes(routes)
+        self.register_routes(app, routes)
+
+    def validate_routes(self, routes: List[FinalRoute]):
+        # Flask doesn't complain about duplicate rules (it will match the first
+        # route found), and the store only keeps the last route per endpoint
+        conflicts = find_route_conflicts(routes)
+        if conflicts:
+            from warnings import warn
+            for conflict in conflicts:
+                warn(format_route_conflict(conflict))
+
+    def register_routes(self, app: Flask, routes: Iterable[FinalRoute]):
+        for route in routes:
+            self.store.endpoints[route.endpoint] = route
+
+        bundle_prefixes = self.get_bundle_module_prefixes(app.unchained.BUNDLES)
 
         bundle_route_endpoints = set()
         for endpoint, route in self.store.endpoints.items():
-            module_name = route.module_name
-            for top_level_bundle_name, hierarchy in bundle_names:
-                for bundle_name in hierarchy:
-                    if module_name and module_name.startswith(bundle_name):
-                        self.store.bundle_routes[top_level_bundle_name].append(route)
-                        bundle_route_endpoints.add(endpoint)
-                        break
+            bundle_name = self.get_owning_bundle_name(route.module_name,
+                                                      bundle_prefixes)
+            if bundle_name:
+                self.store.bundle_routes[bundle_name].append(route)
+                bundle_route_endpoints.add(endpoint)
 
         self.store.other_routes = [route for endpoint, route
                                    in self.store.endpoints.items()
                                    if endpoint not in bundle_route_endpoints]
 
+        timings = get_startup_timings(app)
         for route in self.store.other_routes:
+            start = time.perf_counter()
             app.add_url_rule(route.full_rule,
                              defaults=route.defaults,
                              endpoint=route.endpoint,
                              methods=route.methods,
                              view_func=route.view_func,
                              **route.rule_options)
+            timings.add(self.name, 'add_url_rule',
+                        time.perf_counter() - start, route.module_name)
             self.log_action(route)
 
             if self.babel_bundle:
+                start = time.perf_counter()
                 self.babel_bundle.add_url_rule(
                     app,
                     route.full_rule,
@@ -73,6 +132,65 @@ class RegisterRoutesHook(AppFactoryHook):
                     methods=route.methods,
                     view_func=route.view_func,
                     **route.rule_options)
+                timings.add(self.name, 'babel',
+                            time.perf_counter() - start, route.module_name)
+
+        for endpoint, route in self.store.endpoints.items():
+            controller_cls = getattr(route.view_func, 'view_class', None)
+            if controller_cls:
+                self.store.controller_endpoints.setdefault(
+                    (controller_cls, route.method_name), endpoint)
+        app.extensions[EXTENSION_NAME] = self.store
+
+    def write_manifest(self, path: str, bundles: List[Type[Bundle]],
+                       environment: Optional[str] = None):
+        from warnings import warn
+        if self.has_route_predicates:
+            # their results could depend on config the manifest can't track
+            warn(f'WARNING: Not writing the routes manifest to {path}, because '
+                 f'some routes have callable only_if conditions.')
+            return
+
+        # the manifest is stale once any module from any bundle changes
+        bundle_module_names = [bundle.module_name for bundle in bundles]
+        source_module_names = [
+            name for name in list(sys.modules)
+            if any(name == bundle_module_name
+                   or name.startswith(f'{bundle_module_name}.')
+                   for bundle_module_name in bundle_module_names)]
+        try:
+            write_manifest(path, self.store.endpoints.values(),
+                           source_module_names, environment)
+        except (ManifestError, OSError) as e:
+            warn(f'WARNING: Could not write the routes manifest to {path}: {e}')
+
+    def get_bundle_module_prefixes(self, bundles: List[Type[Bundle]],
+                                   ) -> Dict[str, str]:
+        """
+        Returns a lookup of bundle module names (for every bundle in the
+        hierarchies of bundles that have views) to the name of the top-level
+        bundle owning them. If more than one bundle shares a module name, the
+        first one wins.
+        """
+        prefixes = {}
+        for bundle in bundles:
+            for bundle_cls in bundle.iter_class_hierarchy():
+                if has_views(bundle_cls):
+                    prefixes.setdefault(bundle_cls.module_name, bundle.name)
+        return prefixes
+
+    def get_owning_bundle_name(self, module_name: Optional[str],
+                               bundle_prefixes: Dict[str, str],
+                               ) -> Optional[str]:
+        """
+        Returns the name of the top-level bundle whose (longest matching)
+        module name is a dotted prefix of module_name, if any
+        """
+        while module_name:
+            if module_name in bundle_prefixes:
+                return bundle_prefixes[module_name]
+            module_name = module_name.rpartition('.')[0]
+        return None
 
     def get_explicit_routes(self, bundle: Type[Bundle]):
         if not issubclass(bundle, AppBundle):
@@ -90,7 +208,6 @@ class RegisterRoutesHook(AppFactoryHook):
         bundle_views_module_name = getattr(bundle, 'views_module_name', 'views')
         views_module_name = f'{bundle.module_name}.{bundle_views_module_name}'
         views_module = importlib.import_module(views_module_name)
-        views_module = importlib.reload(views_module)
 
         for _, obj in inspect.getmembers(views_module, self.type_check):
             if hasattr(obj, FN_ROUTES_ATTR):
@@ -0,0 +1,336 @@
+"""
+Serialized route manifests, for starting (production) workers without having to
+discover, reduce, and finalize routes on every process start
+
+The manifest is a JSON file containing the finalized route table, along with a
+checksum over the modification times of the source files the routes were
+discovered from. When any of those files change (or disappear), the manifest is
+considered stale and the routes get rediscovered (and the manifest rewritten).
+
+NOTE: routes' ``only_if`` conditions are evaluated when the manifest gets
+written; the manifest only contains the routes that were registered then. So
+manifests are only used by apps running in the same environment (``app.env``)
+they were written in, and the routes hook doesn't write a manifest at all when
+any of the routes has a callable ``only_if`` (whose result could depend on any
+config).
+
+Routes loaded from a manifest can optionally use :class:`LazyView` proxies as
+their view functions, so that view modules only get imported once one of their
+endpoints gets requested (the registered url rules are the same either way).
+For that to work, the blueprints hook (only with lazy views enabled) also adds
+the app's blueprints to the manifest (as their constructor arguments), so that it
+doesn't need to import the views modules to find them. Only plain blueprints without any deferred setup
+functions (eg from ``@bp.route`` or ``@bp.before_request``) can be serialized.
+"""
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+import threading
+
+from flask import Blueprint
+from typing import *
+
+from .controller import _run_awaitable
+from .route import FinalRoute
+
+
+MANIFEST_VERSION = 1
+
+
+class ManifestError(Exception):
+    """
+    Raised when a route cannot be serialized into a manifest
+    """
+
+
+def write_manifest(path: str,
+                   routes: Iterable[FinalRoute],
+                   source_module_names: Iterable[str] = (),
+                   environment: Optional[str] = None,
+                   ) -> None:
+    """
+    Writes the finalized routes to a manifest file at path
+
+    :param path: where to write the manifest
+    :param routes: the finalized routes to serialize (in registration order)
+    :param source_module_names: the (already imported) modules the routes were
+      discovered from, in addition to the modules of the view functions
+      themselves, whose source files determine the manifest's freshness
+    :param environment: the environment the routes were discovered in (the
+      manifest only gets used by apps running in the same environment)
+    """
+    entries = [_serialize_route(route) for route in routes]
+    module_names = set(source_module_names).union(
+        entry['view']['module'] for entry in entries)
+    sources = sorted(filter(None, (_get_source_file(module_name)
+                                   for module_name in module_names)))
+    manifest = {'version': MANIFEST_VERSION,
+                'environment': environment,
+                'checksum': get_sources_checksum(sources),
+                'sources': sources,
+                'routes': entries}
+
+    _write_json(path, manifest)
+
+
+def write_manifest_blueprints(path: str,
+                              blueprints: Iterable[Blueprint],
+                              environment: Optional[str] = None,
+                              ) -> bool:
+    """
+    Adds the blueprints (in registration order) to the usable manifest file at
+    path (if any), returning whether or not the manifest was updated
+
+    :param path: where the manifest is
+    :param blueprints: the blueprints to serialize
+    :param environment: the environment the manifest was written in
+    """
+    manifest = read_manifest(path, environment)
+    if manifest is None:
+        return False
+
+    entries = [_serialize_blueprint(blueprint) for blueprint in blueprints]
+    if manifest.get('blueprints') == entries:
+        return False
+
+    sources = set(manifest['sources']).union(filter(None, (
+        _get_source_file(entry['import_name']) for entry in entries)))
+    manifest['sources'] = sorted(sources)
+    manifest['checksum'] = get_sources_checksum(manifest['sources'])
+    manifest['blueprints'] = entries
+    _write_json(path, manifest)
+    return True
+
+
+def load_manifest_blueprints(path: str,
+                             environment: Optional[str] = None,
+                             ) -> Optional[List[Blueprint]]:
+    """
+    Returns the blueprints from the manifest file at path, or None if the
+    manifest isn't usable or doesn't contain the blueprints
+    """
+    manifest = read_manifest(path, environment)
+    if manifest is None or 'blueprints' not in manifest:
+        return None
+    return [Blueprint(**entry) for entry in manifest['blueprints']]
+
+
+def load_manifest(path: str,
+                  lazy_views: bool = False,
+                  environment: Optional[str] = None,
+                  ) -> Optional[List[FinalRoute]]:
+    """
+    Returns the finalized routes from the manifest file at path, or None if the
+    manifest doesn't exist, is from a different version or environment, or is
+    stale
+
+    :param path: where to read the manifest from
+    :param lazy_views: whether to use :class:`LazyView` proxies instead of
+      importing the view functions
+    :param environment: the environment of the app loading the manifest
+    """
+    manifest = read_manifest(path, environment)
+    if manifest is None:
+        return None
+    return [_deserialize_route(entry, lazy_views)
+            for entry in manifest['routes']]
+
+
+def read_manifest(path: str,
+                  environment: Optional[str] = None,
+                  ) -> Optional[Dict[str, Any]]:
+    """
+    Returns the (raw) contents of the manifest file at path if it's usable (in
+    the given environment), otherwise None
+    """
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (not isinstance(manifest, dict)
+            or manifest.get('version') != MANIFEST_VERSION
+            or manifest.get('environment') != environment):
+        return None
+
+    checksum = get_sources_checksum(manifest.get('sources', []))
+    if checksum is None or checksum != manifest.get('checksum'):
+        return None
+    return manifest
+
+
+def get_sources_checksum(sources: List[str]) -> Optional[str]:
+    """
+    Returns a checksum over the paths and modification times of sources, or
+    None if any of them no longer exist
+    """
+    sha = hashlib.sha1()
+    for source in sources:
+        try:
+            mtime = os.stat(source).st_mtime_ns
+        except OSError:
+            return None
+        sha.update(f'{source}:{mtime}\n'.encode('utf-8'))
+    return sha.hexdigest()
+
+
+def resolve_view_func(view: Dict[str, str]) -> Callable:
+    """
+    Imports and returns the view function for a serialized view target
+    """
+    importlib.import_module(view['module'])
+    obj = _resolve(view['module'], view['qualname'])
+    if obj is None:
+        raise ImportError(f'Could not import {view["module"]}.'
+                          f'{view["qualname"]}')
+
+    if view.get('method_name'):
+        return obj.method_as_view(view['method_name'])
+    return obj
+
+
+class LazyView:
+    """
+    A proxy view function for a serialized view target, which imports the view
+    (calling method_as_view for controller views) the first time it's called
+    """
+    def __init__(self, view: Dict[str, str]):
+        self.view = view
+        self.__module__ = view['module']
+        self.__name__ = (view.get('method_name')
+                         or view['qualname'].rpartition('.')[2])
+        self.__qualname__ = view['qualname']
+        self._view_func = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._view_func is not None
+
+    def resolve(self) -> Callable:
+        """
+        Returns the actual view function, importing it if necessary
+        """
+        if self._view_func is None:
+            with self._lock:
+                if self._view_func is None:
+                    self._view_func = resolve_view_func(self.view)
+        return self._view_func
+
+    def __call__(self, *args, **kwargs):
+        rv = self.resolve()(*args, **kwargs)
+        if inspect.isawaitable(rv):
+            return _run_awaitable(rv)
+        return rv
+
+    def __repr__(self):
+        return f'<LazyView {self.__module__}.{self.__qualname__}>'
+
+
+def _write_json(path: str, manifest: Dict[str, Any]) -> None:
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)  # atomic, for concurrently starting workers
+
+
+def _serialize_blueprint(blueprint: Blueprint) -> Dict[str, Any]:
+    if type(blueprint) is not Blueprint or blueprint.deferred_functions:
+        raise ManifestError(f'The blueprint {blueprint.name} cannot be '
+                            f'serialized into a manifest (only Blueprints '
+                            f'without deferred functions can be)')
+
+    entry = {'name': blueprint.name,
+             'import_name': blueprint.import_name,
+             'root_path': blueprint.root_path,
+             'static_folder': blueprint.static_folder,
+             'static_url_path': blueprint.static_url_path,
+             'template_folder': blueprint.template_folder,
+             'url_prefix': blueprint.url_prefix,
+             'subdomain': blueprint.subdomain,
+             'url_defaults': blueprint.url_values_defaults or None}
+    try:
+        json.dumps(entry)
+    except (TypeError, ValueError) as e:
+        raise ManifestError(f'The blueprint {blueprint.name} cannot be '
+                            f'serialized into a manifest ({e})')
+    return entry
+
+
+def _serialize_route(route: FinalRoute) -> Dict[str, Any]:
+    view = _get_view_target(route)
+    entry = {'full_rule': route.full_rule,
+             'endpoint': route.endpoint,
+             'methods': list(route.methods),
+             'defaults': route.defaults,
+             'rule_options': route.rule_options,
+             'module_name': route.module_name,
+             'full_name': route.full_name,
+             'method_name': route.method_name,
+             'bp_name': route.bp_name,
+             'bp_prefix': route.bp_prefix,
+             'is_member': route.is_member,
+             'rule': route.rule,
+             'view': view}
+    try:
+        json.dumps(entry)
+    except (TypeError, ValueError) as e:
+        raise ManifestError(f'The route for endpoint {route.endpoint} cannot '
+                            f'be serialized into a manifest ({e})')
+    return entry
+
+
+def _deserialize_route(entry: Dict[str, Any], lazy_views: bool) -> FinalRoute:
+    view_func = (LazyView(entry['view']) if lazy_views
+                 else resolve_view_func(entry['view']))
+    return FinalRoute(blueprint=None,
+                      bp_name=entry['bp_name'],
+                      bp_prefix=entry['bp_prefix'],
+                      defaults=entry['defaults'],
+                      endpoint=entry['endpoint'],
+                      full_name=entry['full_name'],
+                      full_rule=entry['full_rule'],
+                      is_member=entry['is_member'],
+                      method_name=entry['method_name'],
+                      methods=entry['methods'],
+                      module_name=entry['module_name'],
+                      only_if=None,
+                      rule=entry['rule'],
+                      rule_options=entry['rule_options'],
+                      view_func=view_func)
+
+
+def _get_view_target(route: FinalRoute) -> Dict[str, Optional[str]]:
+    if isinstance(route.view_func, LazyView):
+        return route.view_func.view
+
+    view_class = getattr(route.view_func, 'view_class', None)
+    if view_class is not None:
+        target, method_name = view_class, route.method_name
+    else:
+        target, method_name = route.view_func, None
+
+    module = getattr(target, '__module__', None)
+    qualname = getattr(target, '__qualname__', None)
+    resolved = module and qualname and _resolve(module, qualname)
+    if getattr(resolved, '__qualname__', None) != qualname:
+        raise ManifestError(f'The view for endpoint {route.endpoint} is not '
+                            f'importable by its dotted path ({target!r})')
+    return {'module': module, 'qualname': qualname, 'method_name': method_name}
+
+
+def _resolve(module_name: str, qualname: str) -> Any:
+    obj = sys.modules.get(module_name)
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr, None)
+    return obj
+
+
+def _get_source_file(module_name: str) -> Optional[str]:
+    module = sys.modules.get(module_name)
+    source = getattr(module, '__file__', None)
+    return os.path.abspath(source) if source else None
@@ -1,9 +1,13 @@
+import inspect
+
 from flask_unchained.di import setup_class_dependency_injection
 from flask_unchained.utils import deep_getattr
 from types import FunctionType
+from typing import *
 
 from .attr_constants import (
-    ABSTRACT_ATTR, CONTROLLER_ROUTES_ATTR, FN_ROUTES_ATTR, NO_ROUTES_ATTR,
+    ABSTRACT_ATTR, ASYNC_METHODS_ATTR, CONTROLLER_ROUTES_ATTR,
+    DECORATED_METHODS_ATTR, FN_ROUTES_ATTR, NAME_CACHE_ATTR, NO_ROUTES_ATTR,
     NOT_VIEWS_ATTR, REMOVE_SUFFIXES_ATTR)
 from .constants import (
     ALL_METHODS, INDEX_METHODS, CREATE, DELETE, GET, LIST, PATCH, PUT)
@@ -14,6 +18,9 @@ from .utils import controller_name, join, get_param_tuples, method_name_to_url
 CONTROLLER_REMOVE_EXTRA_SUFFIXES = ['View']
 RESOURCE_REMOVE_EXTRA_SUFFIXES = ['MethodView']
 
+# the class attributes that the cached derived names depend upon
+NAME_CACHE_DEPENDENCIES = {'__name__', REMOVE_SUFFIXES_ATTR}
+
 
 class ControllerMeta(type):
     """
@@ -25,10 +32,18 @@ class ControllerMeta(type):
         - check if methods were decorated with @route, otherwise
           create a new Route for each method
         - finish initializing routes (set blueprint, _controller_name)
+        - remember which view methods are coroutine functions
+          (ASYNC_METHODS_ATTR)
+    - give every class its own (empty) caches of decorated view methods and
+      derived names (NAME_CACHE_ATTR), the latter of which gets cleared
+      whenever the class (or any of its bases) gets renamed or has its
+      REMOVE_SUFFIXES_ATTR changed
     """
     def __new__(mcs, name, bases, clsdict):
         setup_class_dependency_injection(name, clsdict)
         cls = super().__new__(mcs, name, bases, clsdict)
+        setattr(cls, DECORATED_METHODS_ATTR, {})
+        setattr(cls, NAME_CACHE_ATTR, {})
 
         if ABSTRACT_ATTR in clsdict:
             setattr(cls, NOT_VIEWS_ATTR, get_not_views(clsdict, bases))
@@ -37,14 +52,21 @@ class ControllerMeta(type):
             return cls
 
         controller_routes = getattr(cls, CONTROLLER_ROUTES_ATTR, {}).copy()
+        async_methods = set(getattr(cls, ASYNC_METHODS_ATTR, set()))
         not_views = deep_getattr({}, bases, NOT_VIEWS_ATTR)
 
         for method_name, method in clsdict.items():
             if (method_name in not_views
                     or not is_view_func(method_name, method)):
                 controller_routes.pop(method_name, None)
+                async_methods.discard(method_name)
                 continue
 
+            if is_async_func(method):
+                async_methods.add(method_name)
+            else:
+                async_methods.discard(method_name)
+
             method_routes = getattr(method, FN_ROUTES_ATTR,
                                     [Route(None, method)])
             for route in method_routes:
@@ -53,13 +75,28 @@ class ControllerMeta(type):
             controller_routes[method_name] = method_routes
 
         setattr(cls, CONTROLLER_ROUTES_ATTR, controller_routes)
+        setattr(cls, ASYNC_METHODS_ATTR, async_methods)
         return cls
 
-    def route_rule(cls, route: Route):
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if name in NAME_CACHE_DEPENDENCIES:
+            clear_name_caches(cls)
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        if name in NAME_CACHE_DEPENDENCIES:
+            clear_name_caches(cls)
+
+    def route_rule(cls, route: Route, url_prefix: Optional[str] = None):
+        """
+        Returns the full url rule for route (prefixed by url_prefix if given,
+        otherwise by the class's url_prefix)
+        """
         rule = route.rule
         if not rule:
             rule = method_name_to_url(route.method_name)
-        return join(cls.url_prefix, rule)
+        return join(url_prefix or cls.url_prefix, rule)
 
 
 class ResourceMeta(ControllerMeta):
@@ -102,20 +139,33 @@ class ResourceMeta(ControllerMeta):
 
         return cls
 
-    def route_rule(cls, route: Route):
+    def route_rule(cls, route: Route, url_prefix: Optional[str] = None):
         rule = route.rule
         if not rule:
             rule = method_name_to_url(route.method_name)
         if route.is_member:
             rule = rename_parent_resource_param_name(
                 cls, join(cls.member_param, rule))
-        return join(cls.url_prefix, rule)
+        return join(url_prefix or cls.url_prefix, rule)
 
-    def subresource_route_rule(cls, subresource_route: Route):
-        rule = join(cls.url_prefix, cls.member_param, subresource_route.rule)
+    def subresource_route_rule(cls, subresource_route: Route,
+                               url_prefix: Optional[str] = None):
+        rule = join(url_prefix or cls.url_prefix, cls.member_param,
+                    subresource_route.rule)
         return rename_parent_resource_param_name(cls, rule)
 
 
+def clear_name_caches(cls):
+    # subclasses inherit REMOVE_SUFFIXES_ATTR, so their names depend on ours
+    classes = [cls]
+    while classes:
+        klass = classes.pop()
+        name_cache = klass.__dict__.get(NAME_CACHE_ATTR)
+        if name_cache:
+            name_cache.clear()
+        classes.extend(klass.__subclasses__())
+
+
 def get_not_views(clsdict, bases):
     not_views = deep_getattr({}, bases, NOT_VIEWS_ATTR, [])
     return ({name for name, method in clsdict.items()
@@ -130,6 +180,12 @@ def get_remove_suffixes(name, bases, extras):
             + existing_suffixes)
 
 
+def is_async_func(method):
+    # methods decorated with (functools.wraps-using) sync decorators still
+    # return coroutines if the method they wrap is a coroutine function
+    return inspect.iscoroutinefunction(inspect.unwrap(method))
+
+
 def is_view_func(method_name, method):
     is_function = isinstance(method, FunctionType)
     is_private = method_name.startswith('_')
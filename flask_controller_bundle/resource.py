@@ -1,5 +1,6 @@
 from flask_unchained.string_utils import pluralize
 
+from .attr_constants import NAME_CACHE_ATTR
 from .controller import Controller
 from .metaclasses import ResourceMeta
 from .utils import controller_name
@@ -7,7 +8,15 @@ from .utils import controller_name
 
 class UrlPrefixDescriptor:
     def __get__(self, instance, cls):
-        return '/' + pluralize(controller_name(cls))
+        name_cache = cls.__dict__.get(NAME_CACHE_ATTR)
+        if name_cache is None:
+            return '/' + pluralize(controller_name(cls))
+        try:
+            return name_cache['url_prefix']
+        except KeyError:
+            url_prefix = '/' + pluralize(controller_name(cls))
+            name_cache['url_prefix'] = url_prefix
+            return url_prefix
 
 
 class Resource(Controller, metaclass=ResourceMeta):
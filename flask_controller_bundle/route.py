@@ -1,6 +1,7 @@
 import inspect
 
 from flask_unchained.string_utils import snake_case
+from typing import *
 
 from .constants import _missing
 from .utils import join, method_name_to_url
@@ -41,11 +42,27 @@ class Route:
         # extra private (should only be used by controller metaclasses)
         self._controller_name = None
 
-    def should_register(self, app):
+    def should_register(self, app, predicate_results=None):
+        """
+        Returns whether or not this route should be registered with app
+
+        :param app: the app to pass to callable ``only_if`` predicates
+        :param predicate_results: an optional dict to cache the results of
+          ``only_if`` predicates in (for sharing them between routes during
+          a single registration pass with the same app)
+        """
         if self.only_if is None:
             return True
         elif callable(self.only_if):
-            return self.only_if(app)
+            if predicate_results is None:
+                return self.only_if(app)
+            try:
+                return predicate_results[self.only_if]
+            except KeyError:
+                result = predicate_results[self.only_if] = self.only_if(app)
+                return result
+            except TypeError:  # unhashable callable
+                return self.only_if(app)
         return bool(self.only_if)
 
     @property
@@ -121,9 +138,9 @@ class Route:
 
     @property
     def module_name(self):
-        if not self.view_func:
-            return None
-        return inspect.getmodule(self.view_func).__name__
+        if self._module_name is _missing:
+            self._module_name = get_module_name(self.view_func)
+        return self._module_name
 
     @property
     def only_if(self):
@@ -135,6 +152,15 @@ class Route:
     def only_if(self, only_if):
         self._only_if = only_if
 
+    @property
+    def view_func(self):
+        return self._view_func
+
+    @view_func.setter
+    def view_func(self, view_func):
+        self._view_func = view_func
+        self._module_name = _missing
+
     @property
     def rule(self):
         if self._rule:
@@ -158,6 +184,15 @@ class Route:
         new.__dict__ = self.__dict__.copy()
         return new
 
+    def freeze(self) -> 'FinalRoute':
+        """
+        Returns a :class:`FinalRoute` with all of this route's properties
+        resolved. Only call this once the route is fully initialized (that is,
+        after :func:`~flask_controller_bundle.routes.reduce_routes`).
+        """
+        return FinalRoute(**{attr: getattr(self, attr)
+                             for attr in FinalRoute.__slots__})
+
     @property
     def full_name(self):
         if not self.view_func:
@@ -170,3 +205,55 @@ class Route:
 
     def __repr__(self):
         return f'<Route endpoint={self.endpoint}>'
+
+
+def filter_routes_to_register(routes: Iterable[Union[Route, 'FinalRoute']],
+                              app,
+                              ) -> List[Union[Route, 'FinalRoute']]:
+    """
+    Returns the routes that should be registered with app, evaluating each
+    distinct ``only_if`` predicate only once
+    """
+    predicate_results = {}
+    return [route for route in routes
+            if route.should_register(app, predicate_results)]
+
+
+def get_module_name(view_func):
+    """
+    Returns the name of the module a view function was defined in, preferring
+    its ``__module__`` (a plain attribute lookup) over ``inspect.getmodule``
+    (which may need to scan ``sys.modules``)
+    """
+    if not view_func:
+        return None
+    module_name = getattr(view_func, '__module__', None)
+    if isinstance(module_name, str):
+        return module_name
+    module = inspect.getmodule(view_func)
+    return module.__name__ if module else None
+
+
+class FinalRoute:
+    """
+    A read-only, fully resolved snapshot of a :class:`Route`, as stored by the
+    routes hook once all routes have been reduced. Every attribute is computed
+    once (instead of on every access), and instances use ``__slots__`` to keep
+    large route tables compact.
+    """
+    __slots__ = ('blueprint', 'bp_name', 'bp_prefix', 'defaults', 'endpoint',
+                 'full_name', 'full_rule', 'is_member', 'method_name',
+                 'methods', 'module_name', 'only_if', 'rule', 'rule_options',
+                 'view_func')
+
+    def __init__(self, **attrs):
+        for attr in self.__slots__:
+            setattr(self, attr, attrs[attr])
+
+    should_register = Route.should_register
+
+    def freeze(self) -> 'FinalRoute':
+        return self
+
+    def __repr__(self):
+        return f'<FinalRoute endpoint={self.endpoint}>'
@@ -1,6 +1,7 @@
 import importlib
 import inspect
 import sys
+import threading
 
 from flask import Blueprint, Flask
 from typing import *
@@ -10,7 +11,8 @@ from .constants import _missing
 from .controller import Controller
 from .resource import Resource
 from .route import Route
-from .utils import join, method_name_to_url
+from .timing import timed_module
+from .utils import join, method_name_to_url, parallel_map
 
 Defaults = Dict[str, Any]
 Endpoints = Union[List[str], Tuple[str], Set[str]]
@@ -26,12 +28,6 @@ def controller(url_prefix_or_controller_cls: Union[str, Type[Controller]],
     url_prefix, controller_cls = _normalize_args(
         url_prefix_or_controller_cls, controller_cls, _is_controller_cls)
 
-    # FIXME this business of needing to set and then restore the class's
-    # url_prefix is kinda very crap. (also applies in the resource function)
-    controller_url_prefix = controller_cls.url_prefix
-    if url_prefix:
-        controller_cls.url_prefix = url_prefix
-
     routes = []
     controller_routes = getattr(controller_cls, CONTROLLER_ROUTES_ATTR)
     if rules is None:
@@ -44,9 +40,7 @@ def controller(url_prefix_or_controller_cls: Union[str, Type[Controller]],
             else:
                 routes.append(route)
 
-    yield from _normalize_controller_routes(routes, controller_cls)
-
-    controller_cls.url_prefix = controller_url_prefix
+    yield from _normalize_controller_routes(routes, controller_cls, url_prefix)
 
 
 def func(rule_or_view_func: Union[str, Callable],
@@ -100,16 +94,20 @@ def include(module_name: str,
             attr: str = 'routes',
             exclude: Optional[Endpoints] = None,
             only: Optional[Endpoints] = None,
+            reload: bool = False,
             ) -> RouteGenerator:
     # because routes are generators, once they've been "drained", they can't be
-    # used again. under normal end-user-app circumstances this reload probably
-    # wouldn't be needed, but it's at least required for the tests to pass
-    if module_name in sys.modules:
+    # used again. so instead of re-importing the module every time, the reduced
+    # routes get cached per module (and attr), and copies of them get replayed
+    # for as long as the module's routes variable stays the same object. pass
+    # reload=True to force re-executing the module (eg after editing it)
+    if reload and module_name in sys.modules:
         del sys.modules[module_name]
-    module = importlib.import_module(module_name)
+    with timed_module('import', module_name):
+        module = importlib.import_module(module_name)
 
     try:
-        routes = reduce_routes(getattr(module, attr))
+        routes = getattr(module, attr)
     except AttributeError:
         raise AttributeError(f'Could not find a variable named `{attr}` '
                              f'in the {module_name} module!')
@@ -121,7 +119,7 @@ def include(module_name: str,
             return False
         return True
 
-    for route in routes:
+    for route in _get_module_routes(module_name, attr, routes):
         if should_include_route(route):
             yield route
 
@@ -189,10 +187,6 @@ def resource(url_prefix_or_resource_cls: Union[str, Type[Resource]],
     url_prefix, resource_cls = _normalize_args(
         url_prefix_or_resource_cls, resource_cls, _is_resource_cls)
 
-    resource_url_prefix = resource_cls.url_prefix
-    if url_prefix:
-        resource_cls.url_prefix = url_prefix
-
     routes = getattr(resource_cls, CONTROLLER_ROUTES_ATTR)
     if rules is not None:
         routes = {method_name: method_routes
@@ -201,7 +195,8 @@ def resource(url_prefix_or_resource_cls: Union[str, Type[Resource]],
         for route in rules:
             routes[route.method_name] = route
 
-    yield from _normalize_controller_routes(routes.values(), resource_cls)
+    yield from _normalize_controller_routes(routes.values(), resource_cls,
+                                            url_prefix)
 
     for subroute in reduce_routes(subresources):
         subroute = subroute.copy()
@@ -214,22 +209,29 @@ def resource(url_prefix_or_resource_cls: Union[str, Type[Resource]],
                  f'{subroute.bp_name!r} with {bp_name!r}')
         subroute.blueprint = resource_cls.blueprint
 
-        subroute.rule = resource_cls.subresource_route_rule(subroute)
+        subroute.rule = resource_cls.subresource_route_rule(subroute,
+                                                            url_prefix)
         yield subroute
 
-    resource_cls.url_prefix = resource_url_prefix
-
 
 def reduce_routes(routes: Iterable[Union[Route, RouteGenerator]],
                   ) -> RouteGenerator:
+    # flattens nested iterables of routes using an explicit stack of iterators
+    # (rather than recursion), so that deeply nested route trees don't pay for
+    # an extra generator layer (and stack frame) per level
     if not routes:
-        raise StopIteration
-
-    for route in routes:
-        if isinstance(route, Route):
-            yield route
+        return
+
+    stack = [iter(routes)]
+    while stack:
+        for route in stack[-1]:
+            if isinstance(route, Route):
+                yield route
+            elif route:
+                stack.append(iter(route))
+                break
         else:
-            yield from reduce_routes(route)
+            stack.pop()
 
 
 def rule(rule: str,
@@ -247,6 +249,61 @@ def rule(rule: str,
                 only_if=only_if, **rule_options)
 
 
+# (module name, attr) -> (routes variable, reduced routes)
+_module_routes_cache: Dict[Tuple[str, str], Tuple[Any, List[Route]]] = {}
+
+# (module name, attr) -> the lock guarding the reduction of its routes
+_module_routes_locks: Dict[Tuple[str, str], threading.RLock] = {}
+_module_routes_locks_lock = threading.Lock()
+
+
+def _get_module_routes(module_name: str, attr: str, routes,
+                       workers=None) -> List[Route]:
+    key = (module_name, attr)
+    with timed_module('collect', module_name):
+        cached = _module_routes_cache.get(key)
+        if cached is None or cached[0] is not routes:
+            # the routes generators can only be drained once, so (apps getting
+            # created in parallel) threads must wait for the first reduction
+            with _get_module_routes_lock(key):
+                cached = _module_routes_cache.get(key)
+                if cached is None or cached[0] is not routes:
+                    cached = (routes, _reduce_module_routes(routes, workers))
+                    _module_routes_cache[key] = cached
+        return [_replay_route(route) for route in cached[1]]
+
+
+def _get_module_routes_lock(key: Tuple[str, str]) -> threading.RLock:
+    with _module_routes_locks_lock:
+        try:
+            return _module_routes_locks[key]
+        except KeyError:
+            _module_routes_locks[key] = lock = threading.RLock()
+            return lock
+
+
+def _reduce_module_routes(routes, workers=None) -> List[Route]:
+    if not workers or not routes:
+        return list(reduce_routes(routes))
+
+    # reduce each top-level item on a thread pool, merging the results in
+    # their declared order
+    return [route for item_routes in parallel_map(
+                lambda item: list(reduce_routes([item])), routes, workers)
+            for route in item_routes]
+
+
+def _replay_route(route: Route) -> Route:
+    route = route.copy()
+
+    # give every app its own controller view functions (rather than sharing
+    # the ones created when the routes were first reduced)
+    view_class = getattr(route.view_func, 'view_class', None)
+    if inspect.isclass(view_class) and issubclass(view_class, Controller):
+        route.view_func = view_class.method_as_view(route.method_name)
+    return route
+
+
 def _inherit_route_options(parent: Route, child: Route):
     if parent._blueprint is _missing:
         parent.blueprint = child.blueprint
@@ -319,11 +376,12 @@ def _normalize_args(maybe_str, maybe_none, test):
 
 def _normalize_controller_routes(rules: Iterable[Route],
                                  controller_cls: Type[Controller],
+                                 url_prefix: Optional[str] = None,
                                  ) -> RouteGenerator:
     for route in reduce_routes(rules):
         route = route.copy()
         route.blueprint = controller_cls.blueprint
         route._controller_name = controller_cls.__name__
         route.view_func = controller_cls.method_as_view(route.method_name)
-        route.rule = controller_cls.route_rule(route)
+        route.rule = controller_cls.route_rule(route, url_prefix)
         yield route
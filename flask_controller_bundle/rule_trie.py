@@ -0,0 +1,126 @@
+"""
+Detection of conflicting routes (before they get registered with Flask, which
+silently matches the first of any equivalent rules)
+
+Rules get inserted into a trie keyed by their url segments, with the names of
+url variables normalized away (so that ``/users/<int:id>`` and
+``/users/<int:user_id>`` end up at the same node). Each route is inserted once,
+so finding all conflicts is a single linear pass over the routes.
+"""
+from collections import namedtuple
+from typing import *
+
+from .route import FinalRoute
+from .url_builder import RULE_VARIABLE_RE
+
+
+DUPLICATE = 'duplicate'
+"""the exact same rule (and overlapping methods) as an earlier route"""
+
+SHADOWED = 'shadowed'
+"""an equivalent rule (differing only by url variable names) and overlapping
+methods as an earlier route, which Flask will always match instead"""
+
+ENDPOINT = 'endpoint'
+"""the same endpoint name as an earlier route (which it replaces)"""
+
+RouteConflict = namedtuple('RouteConflict', 'kind route existing')
+
+# werkzeug registers the string converter under both of these names
+_CONVERTER_ALIASES = {'string': 'default'}
+
+
+class RuleTrie:
+    """
+    A trie of url rules, whose nodes are keyed by normalized url segments
+    """
+    __slots__ = ('children', 'routes')
+
+    def __init__(self):
+        self.children: Dict[str, 'RuleTrie'] = {}
+        self.routes: List[Tuple[FrozenSet[str], FinalRoute]] = []
+
+    def insert(self, route: FinalRoute) -> Optional[RouteConflict]:
+        """
+        Adds route to the trie, returning the conflict with the first earlier
+        route matching the same urls (and methods), if any
+        """
+        node = self
+        for segment in get_rule_key(route):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = RuleTrie()
+            node = child
+
+        methods = get_route_methods(route)
+        conflict = None
+        for existing_methods, existing in node.routes:
+            if methods & existing_methods:
+                kind = (DUPLICATE if route.full_rule == existing.full_rule
+                        else SHADOWED)
+                conflict = RouteConflict(kind, route, existing)
+                break
+        node.routes.append((methods, route))
+        return conflict
+
+
+def find_route_conflicts(routes: Iterable[FinalRoute]) -> List[RouteConflict]:
+    """
+    Returns the conflicts between routes (in the order they'd be registered):
+    exact duplicates, rules shadowed by earlier equivalent rules, and endpoint
+    names used more than once
+    """
+    trie = RuleTrie()
+    endpoints: Dict[str, FinalRoute] = {}
+    conflicts = []
+    for route in routes:
+        conflict = trie.insert(route)
+        if conflict:
+            conflicts.append(conflict)
+
+        existing = endpoints.setdefault(route.endpoint, route)
+        if existing is not route:
+            conflicts.append(RouteConflict(ENDPOINT, route, existing))
+    return conflicts
+
+
+def format_route_conflict(conflict: RouteConflict) -> str:
+    route, existing = conflict.route, conflict.existing
+    if conflict.kind == ENDPOINT:
+        return (f'WARNING: The endpoint {route.endpoint} is used by more than '
+                f'one route ({existing.full_rule} and {route.full_rule}); '
+                f'only {route.full_name} will be registered.')
+    elif conflict.kind == DUPLICATE:
+        return (f'WARNING: The rule {route.full_rule} ({route.endpoint}) '
+                f'duplicates the same rule of {existing.endpoint}.')
+    return (f'WARNING: The rule {route.full_rule} ({route.endpoint}) is '
+            f'shadowed by the rule {existing.full_rule} ({existing.endpoint}), '
+            f'which Flask will always match first.')
+
+
+def get_rule_key(route: FinalRoute) -> List[str]:
+    """
+    Returns the normalized segments of the route's rule (prefixed by its host
+    and subdomain, if any)
+    """
+    options = route.rule_options or {}
+    key = [options.get('host') or '', options.get('subdomain') or '']
+    for segment in route.full_rule.split('/'):
+        if '<' in segment:
+            segment = RULE_VARIABLE_RE.sub(_normalize_variable, segment)
+        key.append(segment)
+    return key
+
+
+def get_route_methods(route: FinalRoute) -> FrozenSet[str]:
+    methods = {method.upper() for method in route.methods}
+    if 'GET' in methods:
+        methods.add('HEAD')
+    return frozenset(methods)
+
+
+def _normalize_variable(match) -> str:
+    converter = match.group('converter') or 'default'
+    converter = _CONVERTER_ALIASES.get(converter, converter)
+    args = match.group('args')
+    return f'<{converter}({args})>' if args else f'<{converter}>'
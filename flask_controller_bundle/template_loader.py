@@ -1,15 +1,58 @@
 """
 Extends Flask's template loading support to allow overriding/extending/including
 templates with the same name as templates from later template folders
+
+Which loader wins for each (template, depth) gets cached, so that only the first
+lookup of a template has to try every template folder. When the environment's
+auto_reload is enabled, cached resolutions are validated against the
+modification times of the directories the template could live in (so that
+adding or removing overrides gets picked up without restarting).
+
+At startup, the loader also builds a :class:`TemplateIndex` of every template
+folder, mapping each template to its override chain. Until templates auto
+reload, cache misses of indexed templates get answered from the index instead
+of by trying every template folder.
+
+Compiled templates can be persisted across worker restarts (and deploys) by
+setting ``TEMPLATE_BYTECODE_CACHE_DIR``, which uses an
+:class:`UnchainedBytecodeCache`. The cache can be filled at build time by
+:func:`precompile_templates` (``flask controller precompile-templates``).
+
+With ``EXPLAIN_TEMPLATE_LOADING`` enabled, every template load gets explained in
+the app's log. Setting ``EXPLAIN_TEMPLATE_LOADING_SAMPLE_RATE`` (between 0 and
+1) instead records only a sample of them, as structured entries in a bounded
+buffer (of ``EXPLAIN_TEMPLATE_LOADING_BUFFER_SIZE`` entries), which can be
+dumped on demand using :func:`get_template_loading_explanations`.
 """
+import hashlib
+import os
+import random
 import re
+import sys
+import threading
+import time
 
+from collections import Counter, defaultdict, deque, namedtuple
+from flask import Flask
 from flask.templating import DispatchingJinjaLoader, Environment
-from jinja2 import TemplateNotFound
+from jinja2 import (BaseLoader, FileSystemBytecodeCache, TemplateNotFound,
+                    TemplateSyntaxError, meta)
+from jinja2.loaders import split_template_path
+from typing import *
+
+from .constants import TEMPLATE_EXPLANATIONS_EXTENSION_NAME
 
 
 TEMPLATE_OVERRIDE_RE = re.compile(r'^(?P<template>.+)__(?P<depth>\d+)__$')
 
+TEMPLATE_EXTENSIONS = ('.html', '.htm', '.xml', '.xhtml', '.txt', '.j2',
+                       '.jinja', '.jinja2', '.md', '.csv', '.json', '.js',
+                       '.css', '.svg')
+"""
+the file extensions precompile_templates considers templates (template folders
+can contain other files too, eg images or .DS_Store)
+"""
+
 
 def parse_template(template):
     """returns a 2-tuple of (template_name, number_of_priors)"""
@@ -31,8 +74,115 @@ class UnchainedJinjaEnvironment(Environment):
         return template
 
 
+TemplateResolution = namedtuple('TemplateResolution',
+                                'loader filename signature')
+
+
+TemplateSource = namedtuple('TemplateSource', 'srcobj loader filename')
+
+
+class TemplateIndex:
+    """
+    Maps each template (by its relative path) to its override chain: the
+    ordered list of template folders providing it. The first source gets used
+    for the template itself, the second for its first ``{% extends %}`` of the
+    same name, and so on.
+    """
+    def __init__(self):
+        self.chains: Dict[str, List[TemplateSource]] = defaultdict(list)
+
+    @classmethod
+    def from_loaders(cls, loaders: Iterable[Tuple[Any, BaseLoader]],
+                     ) -> Optional['TemplateIndex']:
+        """
+        Returns the index of the templates of (srcobj, loader) pairs, in
+        priority order, or None if any of the loaders aren't filesystem based
+        """
+        index = cls()
+        for srcobj, loader in loaders:
+            searchpaths = getattr(loader, 'searchpath', None)
+            if searchpaths is None:
+                return None
+
+            # like FileSystemLoader.get_source, the first searchpath wins
+            seen = set()
+            followlinks = getattr(loader, 'followlinks', False)
+            for searchpath in searchpaths:
+                for dirpath, _, filenames in os.walk(searchpath,
+                                                     followlinks=followlinks):
+                    for filename in filenames:
+                        path = os.path.join(dirpath, filename)
+                        template = os.path.relpath(path, searchpath)
+                        template = template.replace(os.path.sep, '/')
+                        if template not in seen:
+                            seen.add(template)
+                            index.chains[template].append(
+                                TemplateSource(srcobj, loader, path))
+        return index
+
+    def get(self, template: str, depth: int = 0) -> Optional[TemplateSource]:
+        """
+        Returns the source of the template at the given override depth, if any
+        """
+        chain = self.chains.get(template, ())
+        return chain[depth] if depth < len(chain) else None
+
+    def get_chain(self, template: str) -> List[TemplateSource]:
+        return list(self.chains.get(template, ()))
+
+    def list_templates(self) -> List[str]:
+        return sorted(self.chains)
+
+    def iter_overrides(self) -> Iterator[Tuple[str, List[TemplateSource]]]:
+        """
+        Yields (template, chain) for every template provided by more than one
+        template folder
+        """
+        for template in self.list_templates():
+            chain = self.chains[template]
+            if len(chain) > 1:
+                yield template, list(chain)
+
+    def __contains__(self, template):
+        return template in self.chains
+
+    def __len__(self):
+        return len(self.chains)
+
+
 class UnchainedJinjaLoader(DispatchingJinjaLoader):
-    def _get_source_explained(self, environment, template):
+    def __init__(self, app):
+        super().__init__(app)
+        self.index: Optional[TemplateIndex] = None
+        self._resolutions: Dict[Tuple[str, int], TemplateResolution] = {}
+
+    def build_index(self) -> Optional[TemplateIndex]:
+        """
+        (Re)builds the index of the templates in every template folder
+        """
+        self.index = TemplateIndex.from_loaders(self._iter_loaders(None))
+        self.clear_cache()
+        return self.index
+
+    def clear_cache(self):
+        """
+        Forgets which loaders templates were resolved to (eg after registering
+        more blueprints, in which case the index should also be rebuilt)
+        """
+        self._resolutions.clear()
+
+    def get_source(self, environment, template):
+        if self.app.config['EXPLAIN_TEMPLATE_LOADING']:
+            sample_rate = self.app.config.get(
+                'EXPLAIN_TEMPLATE_LOADING_SAMPLE_RATE')
+            if sample_rate is None:
+                return self._get_source_explained(environment, template)
+            elif random.random() < sample_rate:
+                return self._get_source_explained(environment, template,
+                                                  sampled=True)
+        return self._get_source_fast(environment, template)
+
+    def _get_source_explained(self, environment, template, sampled=False):
         attempts = []
         trv = None
         original_template = template
@@ -52,16 +202,56 @@ class UnchainedJinjaLoader(DispatchingJinjaLoader):
 
             attempts.append((loader, srcobj, rv))
 
-        explain_template_loading_attempts(self.app, original_template, attempts)
+        if sampled:
+            get_template_loading_explanations(self.app).record(
+                original_template, attempts)
+        else:
+            explain_template_loading_attempts(self.app, original_template,
+                                              attempts)
 
         if trv is not None:
             return trv
         raise TemplateNotFound(template)
 
     def _get_source_fast(self, environment, template):
-        num_priors = 0
         template, expected_priors = parse_template(template)
+        key = (template, expected_priors)
+        auto_reload = environment.auto_reload
+
+        resolution = self._resolutions.get(key)
+        if resolution is not None:
+            if (not auto_reload or resolution.signature ==
+                    self._get_folders_signature(template)):
+                try:
+                    return resolution.loader.get_source(environment, template)
+                except TemplateNotFound:
+                    pass
+            self._resolutions.pop(key, None)
+
+        signature = (self._get_folders_signature(template) if auto_reload
+                     else None)
+        loader, rv = self._find_source(environment, template, expected_priors,
+                                       use_index=not auto_reload)
+        if not auto_reload or signature is not None:
+            self._resolutions[key] = TemplateResolution(loader, rv[1],
+                                                        signature)
+        return rv
+
+    def _find_source(self, environment, template, expected_priors,
+                     use_index=False,
+                     ) -> Tuple[BaseLoader, Tuple[str, Optional[str], Any]]:
+        if use_index and self.index is not None:
+            # templates missing from the index could still come from template
+            # folders added after it was built (eg late blueprints)
+            source = self.index.get(template, expected_priors)
+            if source is not None:
+                try:
+                    return source.loader, source.loader.get_source(
+                        environment, template)
+                except TemplateNotFound:
+                    pass  # removed since the index was built
 
+        num_priors = 0
         for srcobj, loader in self._iter_loaders(template):
             try:
                 rv = loader.get_source(environment, template)
@@ -69,27 +259,232 @@ class UnchainedJinjaLoader(DispatchingJinjaLoader):
                 continue
 
             if expected_priors - num_priors == 0:
-                return rv
+                return loader, rv
             num_priors += 1
 
         raise TemplateNotFound(template)
 
+    def _get_folders_signature(self, template,
+                               ) -> Optional[Tuple[Optional[int], ...]]:
+        """
+        Returns the modification times of the directories template could be
+        found in (for every template folder), or None if any of the loaders
+        aren't filesystem based
+        """
+        pieces = split_template_path(template)[:-1]
+        mtimes = []
+        for srcobj, loader in self._iter_loaders(template):
+            searchpaths = getattr(loader, 'searchpath', None)
+            if searchpaths is None:
+                return None
+            for searchpath in searchpaths:
+                try:
+                    stat = os.stat(os.path.join(searchpath, *pieces))
+                    mtimes.append(stat.st_mtime_ns)
+                except OSError:
+                    mtimes.append(None)
+        return tuple(mtimes)
+
+
+class UnchainedBytecodeCache(FileSystemBytecodeCache):
+    """
+    A filesystem bytecode cache keyed by template name, override depth, and
+    source file, with the source file's path taken relative to the
+    ``sys.path`` entry it lives under (so that the keys stay the same when a
+    deploy moves the project or virtualenv elsewhere). Jinja still compares the
+    checksum of the template source before using any cached bytecode.
+    """
+    def get_cache_key(self, name, filename=None):
+        template, depth = parse_template(name)
+        key = f'{template}|{depth}'
+        if filename:
+            key = f'{key}|{get_stable_path(filename)}'
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def get_stable_path(filename: str) -> str:
+    """
+    Returns filename relative to the longest ``sys.path`` entry containing it
+    (or unchanged if there isn't one)
+    """
+    filename = os.path.abspath(filename)
+    root = None
+    for entry in sys.path:
+        entry = os.path.abspath(entry or os.getcwd())
+        if (filename.startswith(entry.rstrip(os.sep) + os.sep)
+                and (root is None or len(entry) > len(root))):
+            root = entry
+    if root is None:
+        return filename
+    return os.path.relpath(filename, root).replace(os.sep, '/')
+
+
+def precompile_templates(environment: Environment,
+                         extensions: Iterable[str] = TEMPLATE_EXTENSIONS,
+                         ) -> Tuple[List[str], List[Tuple[str, Exception]]]:
+    """
+    Compiles every template (in the loader's priority order) with one of the
+    given file extensions, along with every override depth referenced by
+    ``{% extends %}`` or ``{% include %}`` of a template with the same name,
+    which fills the environment's bytecode cache (if any). Returns a 2-tuple
+    of (compiled_names, [(name, error), ...])
+    """
+    extensions = {extension.lower() for extension in extensions}
+    index = getattr(environment.loader, 'index', None)
+    templates = [template for template in (
+                     index.list_templates() if index is not None
+                     else sorted(environment.list_templates()))
+                 if os.path.splitext(template)[1].lower() in extensions]
+
+    compiled, errors = [], []
+    for template in templates:
+        name = template
+        while name:
+            try:
+                source, filename, _ = environment.loader.get_source(
+                    environment, name)
+                ast = environment.parse(source, name, filename)
+                environment.get_template(name)
+            except (TemplateNotFound, TemplateSyntaxError,
+                    UnicodeDecodeError) as e:
+                errors.append((name, e))
+                break
+            compiled.append(name)
+
+            # the next depth is only used if the template refers to itself
+            name, depth = parse_template(name)
+            if name in meta.find_referenced_templates(ast):
+                name = make_template_override(name, depth)
+            else:
+                name = None
+    return compiled, errors
+
+
+def get_template_index(app: Flask) -> Optional[TemplateIndex]:
+    """
+    Returns the app's template index, if it has one
+    """
+    return getattr(app.jinja_env.loader, 'index', None)
+
 
 def pretty_num(depth):
-    depth += 1
-    if depth == 1:
-        return '1st'
-    elif depth == 2:
-        return '2nd'
-    elif depth == 3:
-        return '3rd'
-    else:
-        return depth + 'th'
+    num = depth + 1
+    if num % 100 in {11, 12, 13}:
+        return '%dth' % num
+    return '%d%s' % (num, {1: 'st', 2: 'nd', 3: 'rd'}.get(num % 10, 'th'))
+
+
+class TemplateLoadingExplanations:
+    """
+    A bounded buffer of (sampled) structured template loading explanations,
+    along with counters of the loaded templates and the sources they were
+    loaded from. Available on the app as
+    ``app.extensions['flask_controller_bundle.template_explanations']`` (or by
+    using :func:`get_template_loading_explanations`).
+    """
+    def __init__(self, maxlen: int = 1000):
+        self.entries = deque(maxlen=maxlen)
+        self.templates = Counter()
+        self.sources = Counter()
+        self.not_found = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, template: str, attempts: List[Tuple[Any, Any, Any]]):
+        """
+        Records the attempts of the loaders at loading template (as passed to
+        :func:`explain_template_loading_attempts`)
+        """
+        name, expected_priors = parse_template(template)
+        entry = {'template': name,
+                 'depth': expected_priors,
+                 'time': time.time(),
+                 'source': None,
+                 'filename': None,
+                 'attempts': []}
+        for _, srcobj, action, triple in _iter_attempt_actions(
+                attempts, expected_priors):
+            source = describe_template_source(srcobj)
+            filename = triple[1] if triple else None
+            entry['attempts'].append({'source': source,
+                                      'action': action,
+                                      'filename': filename})
+            if action == 'using':
+                entry['source'], entry['filename'] = source, filename
+
+        with self._lock:
+            self.entries.append(entry)
+            self.templates[template] += 1
+            if entry['source'] is None:
+                self.not_found[template] += 1
+            else:
+                self.sources[entry['source']] += 1
+
+    def dump(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Returns the counters and the most recent entries (all of them by
+        default) as a JSON-serializable dict
+        """
+        with self._lock:
+            entries = list(self.entries)
+            return {
+                'templates': dict(self.templates.most_common()),
+                'sources': dict(self.sources.most_common()),
+                'not_found': dict(self.not_found.most_common()),
+                'entries': entries[-limit:] if limit else entries,
+            }
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.templates.clear()
+            self.sources.clear()
+            self.not_found.clear()
+
+
+def get_template_loading_explanations(app: Flask,
+                                      ) -> TemplateLoadingExplanations:
+    """
+    Returns the app's sampled template loading explanations (creating them if
+    necessary)
+    """
+    explanations = app.extensions.get(TEMPLATE_EXPLANATIONS_EXTENSION_NAME)
+    if explanations is None:
+        maxlen = app.config.get('EXPLAIN_TEMPLATE_LOADING_BUFFER_SIZE') or 1000
+        explanations = TemplateLoadingExplanations(maxlen)
+        app.extensions[TEMPLATE_EXPLANATIONS_EXTENSION_NAME] = explanations
+    return explanations
+
+
+def describe_template_source(srcobj) -> str:
+    from flask import Blueprint
+    if isinstance(srcobj, Flask):
+        return 'application "%s"' % srcobj.import_name
+    elif isinstance(srcobj, Blueprint):
+        return 'blueprint "%s" (%s)' % (srcobj.name, srcobj.import_name)
+    return repr(srcobj)
+
+
+def _iter_attempt_actions(attempts, expected_priors):
+    """
+    Yields (loader, srcobj, action, triple) for each of the loaders' attempts
+    """
+    total_found = 0
+    for loader, srcobj, triple in attempts:
+        if triple is None:
+            action = 'no match'
+        else:
+            if total_found < expected_priors:
+                action = 'skipping'
+            elif total_found == expected_priors:
+                action = 'using'
+            else:
+                action = 'ignoring'
+            total_found += 1
+        yield loader, srcobj, action, triple
 
 
 def explain_template_loading_attempts(app, template, attempts):
     """This should help developers understand what failed"""
-    from flask import Flask, Blueprint
     from flask.debughelpers import _dump_loader_info
     from flask.globals import _request_ctx_stack
 
@@ -97,43 +492,30 @@ def explain_template_loading_attempts(app, template, attempts):
     info = ['Locating %s template "%s":' % (pretty_num(expected_priors),
                                             template)]
 
-    total_found = 0
     blueprint = None
     reqctx = _request_ctx_stack.top
     if reqctx is not None and reqctx.request.blueprint is not None:
         blueprint = reqctx.request.blueprint
 
-    for idx, (loader, srcobj, triple) in enumerate(attempts):
-        if isinstance(srcobj, Flask):
-            src_info = 'application "%s"' % srcobj.import_name
-        elif isinstance(srcobj, Blueprint):
-            src_info = 'blueprint "%s" (%s)' % (srcobj.name,
-                                                srcobj.import_name)
-        else:
-            src_info = repr(srcobj)
-
+    found = False
+    for idx, (loader, srcobj, action, triple) in enumerate(
+            _iter_attempt_actions(attempts, expected_priors)):
         info.append('% 5d: trying loader of %s' % (
-            idx + 1, src_info))
+            idx + 1, describe_template_source(srcobj)))
 
         for line in _dump_loader_info(loader):
             info.append('       %s' % line)
 
         if triple is None:
-            detail = 'no match'
+            detail = action
         else:
-            if total_found < expected_priors:
-                action = 'skipping'
-            elif total_found == expected_priors:
-                action = 'using'
-            else:
-                action = 'ignoring'
             detail = '%s (%r)' % (action, triple[1] or '<string>')
-            total_found += 1
+            found = found or action == 'using'
 
         info.append('       -> %s' % detail)
 
     seems_fishy = False
-    if total_found < expected_priors:
+    if not found:
         info.append('Error: the template could not be found.')
         seems_fishy = True
 
@@ -0,0 +1,131 @@
+"""
+Startup timings of the bundle's app factory hooks, per hook and phase (and per
+bundle or module within each phase), for tracking down slow app creation
+"""
+import contextvars
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import Flask
+from typing import *
+
+from .constants import TIMINGS_EXTENSION_NAME
+
+
+class StartupTimings:
+    """
+    Accumulates the time spent (in seconds) per hook phase, and optionally per
+    key (a bundle or module name) within each phase. Available on the app as
+    ``app.extensions['flask_controller_bundle.timings']`` (or by using
+    :func:`get_startup_timings`).
+    """
+    def __init__(self):
+        self.phases: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.keys: Dict[Tuple[str, str, str], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, hook: str, phase: str, seconds: float,
+            key: Optional[str] = None):
+        with self._lock:
+            self.phases[(hook, phase)] += seconds
+            if key is not None:
+                self.keys[(hook, phase, key)] += seconds
+
+    @contextmanager
+    def timed(self, hook: str, phase: str, key: Optional[str] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(hook, phase, time.perf_counter() - start, key)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def slowest(self, limit: Optional[int] = 10,
+                ) -> List[Tuple[str, str, str, float]]:
+        """
+        Returns the slowest (hook, phase, key, seconds) entries
+        """
+        entries = sorted(((hook, phase, key, seconds)
+                          for (hook, phase, key), seconds in self.keys.items()),
+                         key=lambda entry: entry[3], reverse=True)
+        return entries[:limit] if limit else entries
+
+    def as_dict(self, limit: Optional[int] = 10) -> Dict[str, Any]:
+        """
+        Returns the timings as a JSON-serializable dict
+        """
+        return {
+            'total': self.total,
+            'phases': [{'hook': hook, 'phase': phase, 'seconds': seconds}
+                       for (hook, phase), seconds in self.phases.items()],
+            'slowest': [{'hook': hook, 'phase': phase, 'key': key,
+                         'seconds': seconds}
+                        for hook, phase, key, seconds in self.slowest(limit)],
+        }
+
+
+def get_startup_timings(app: Flask) -> StartupTimings:
+    """
+    Returns the app's startup timings (creating them if necessary)
+    """
+    timings = app.extensions.get(TIMINGS_EXTENSION_NAME)
+    if timings is None:
+        timings = app.extensions[TIMINGS_EXTENSION_NAME] = StartupTimings()
+    return timings
+
+
+class _ModuleTimingScope:
+    __slots__ = ('timings', 'hook', 'nested_seconds')
+
+    def __init__(self, timings: StartupTimings, hook: str):
+        self.timings = timings
+        self.hook = hook
+        self.nested_seconds = 0.0
+
+
+_module_timing_scope = contextvars.ContextVar('module_timing_scope',
+                                              default=None)
+
+
+@contextmanager
+def recording_module_timings(timings: StartupTimings, hook: str):
+    """
+    Records the time spent in :func:`timed_module` blocks (eg by ``include()``,
+    which has no access to the app) into timings, as phases of hook
+    """
+    token = _module_timing_scope.set(_ModuleTimingScope(timings, hook))
+    try:
+        yield
+    finally:
+        _module_timing_scope.reset(token)
+
+
+@contextmanager
+def timed_module(phase: str, module_name: str):
+    """
+    Times the block as phase, keyed by module_name (if timings are being
+    recorded), excluding the time spent in any nested :func:`timed_module`
+    blocks (so that the time of included modules isn't counted twice)
+    """
+    scope = _module_timing_scope.get()
+    if scope is None:
+        yield
+        return
+
+    inner = _ModuleTimingScope(scope.timings, scope.hook)
+    token = _module_timing_scope.set(inner)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _module_timing_scope.reset(token)
+        elapsed = time.perf_counter() - start
+        scope.timings.add(scope.hook, phase, elapsed - inner.nested_seconds,
+                          module_name)
+        with scope.timings._lock:
+            scope.nested_seconds += elapsed
@@ -0,0 +1,142 @@
+"""
+Compiled url builders, used by url_for to skip Flask's and Werkzeug's full url
+building machinery for the common case of rules with only static parts and/or
+simple url parameters
+"""
+import re
+
+from flask import current_app as app
+from flask.globals import _app_ctx_stack, _request_ctx_stack
+from typing import *
+from urllib.parse import quote
+from weakref import WeakKeyDictionary
+from werkzeug.routing import Map, Rule, ValidationError
+
+
+# the parts of werkzeug's rule syntax: <converter(arguments):variable_name>
+RULE_VARIABLE_RE = re.compile(r'<(?:(?P<converter>[a-zA-Z_][a-zA-Z0-9_]*)'
+                              r'(?:\((?P<args>.*?)\))?:)?'
+                              r'(?P<variable>[a-zA-Z_][a-zA-Z0-9_]*)>')
+
+# the url_for kwargs that the compiled builders don't support
+FLASK_URL_FOR_KWARGS = {'_anchor', '_external', '_method', '_scheme'}
+
+# url_map -> {endpoint: (rule, builder)}
+_builders = WeakKeyDictionary()
+
+
+class UrlBuilder:
+    """
+    A precompiled url builder for a single Werkzeug rule. The url parameters
+    are still converted using the rule's own converters, so the built urls are
+    the same as the ones Werkzeug would build.
+    """
+    __slots__ = ('rule', 'parts', 'arguments')
+
+    def __init__(self, rule: Rule, parts: List[Tuple[bool, str]]):
+        self.rule = rule
+        self.parts = parts
+        self.arguments = frozenset(rule.arguments)
+
+    def build(self, url_adapter, values: Dict[str, Any]) -> Optional[str]:
+        """
+        Returns the url path for the given values (as built by url_adapter),
+        or None if these values require Flask's url_for
+        """
+        if (self.rule.subdomain or '') != url_adapter.subdomain:
+            return None  # werkzeug would need to build an external url
+
+        if values.keys() != self.arguments:
+            return None  # missing arguments or query string parameters
+
+        converters = self.rule._converters
+        try:
+            path = ''.join(converters[data].to_url(values[data]) if is_dynamic
+                           else data
+                           for is_dynamic, data in self.parts)
+        except ValidationError:
+            return None
+        return url_adapter.script_name.rstrip('/') + '/' + path.lstrip('/')
+
+
+def compile_url_builder(rule: Rule, url_map: Map) -> Optional[UrlBuilder]:
+    """
+    Returns a compiled builder for rule, or None if it's not compilable
+    """
+    if (url_map.host_matching
+            or rule.defaults
+            or rule.build_only
+            or '<' in (rule.subdomain or '')):
+        return None
+
+    parts = []
+    pos = 0
+    for match in RULE_VARIABLE_RE.finditer(rule.rule):
+        parts.append((False, rule.rule[pos:match.start()]))
+        parts.append((True, match.group('variable')))
+        pos = match.end()
+    parts.append((False, rule.rule[pos:]))
+
+    static_parts = [data for is_dynamic, data in parts if not is_dynamic]
+    if any('<' in data or '>' in data for data in static_parts):
+        return None
+
+    return UrlBuilder(rule, [
+        (is_dynamic, data if is_dynamic else quote(data, safe='/:|+'))
+        for is_dynamic, data in parts if is_dynamic or data])
+
+
+def get_url_builder(endpoint: str) -> Optional[UrlBuilder]:
+    """
+    Returns the (cached) compiled builder for endpoint, or None if the endpoint
+    doesn't exist, has more than one rule, or its rule isn't compilable
+    """
+    url_map = app.url_map
+    rules = url_map._rules_by_endpoint.get(endpoint)
+    if not rules or len(rules) != 1:
+        return None
+
+    endpoint_builders = _builders.get(url_map)
+    if endpoint_builders is None:
+        endpoint_builders = _builders.setdefault(url_map, {})
+
+    rule = rules[0]
+    cached = endpoint_builders.get(endpoint)
+    if cached is not None and cached[0] is rule:
+        return cached[1]
+
+    builder = compile_url_builder(rule, url_map)
+    endpoint_builders[endpoint] = (rule, builder)
+    return builder
+
+
+def build_url(endpoint: str,
+              values: Dict[str, Any],
+              builder: Optional[UrlBuilder] = None,
+              ) -> Optional[str]:
+    """
+    Builds the url path for endpoint with a compiled builder, returning None
+    if Flask's url_for is needed instead
+
+    :param endpoint: the name of the endpoint
+    :param values: the url_for kwargs
+    :param builder: the builder to use (defaults to the endpoint's builder)
+    """
+    for key in FLASK_URL_FOR_KWARGS:
+        if values.get(key):
+            return None
+
+    builder = builder or get_url_builder(endpoint)
+    if builder is None:
+        return None
+
+    reqctx = _request_ctx_stack.top
+    url_adapter = (reqctx.url_adapter if reqctx is not None
+                   else _app_ctx_stack.top.url_adapter)
+    if url_adapter is None:
+        return None
+
+    url_values = {k: v for k, v in values.items()
+                  if v is not None and k not in FLASK_URL_FOR_KWARGS}
+    app.inject_url_defaults(endpoint, url_values)
+    return builder.build(url_adapter, url_values)
@@ -1,4 +1,6 @@
+import functools
 import re
+import sys
 
 from flask import (
     Response,
@@ -18,8 +20,11 @@ try:
 except ImportError:
     FlaskBabelBundle = None
 
-from .attr_constants import CONTROLLER_ROUTES_ATTR, REMOVE_SUFFIXES_ATTR
-from .constants import _missing
+from .attr_constants import (
+    CONTROLLER_ROUTES_ATTR, NAME_CACHE_ATTR, REMOVE_SUFFIXES_ATTR)
+from .constants import (
+    EXTENSION_NAME, REDIRECT_ALLOWLIST_EXTENSION_NAME, _missing)
+from .url_builder import UrlBuilder, build_url, get_url_builder
 
 
 PARAM_NAME_RE = re.compile(r'<(\w+:)?(?P<param_name>\w+)>')
@@ -27,6 +32,17 @@ LAST_PARAM_NAME_RE = re.compile(r'<(\w+:)?(?P<param_name>\w+)>$')
 
 
 def controller_name(cls) -> str:
+    name_cache = cls.__dict__.get(NAME_CACHE_ATTR)
+    if name_cache is None:
+        return _controller_name(cls)
+    try:
+        return name_cache['controller_name']
+    except KeyError:
+        name_cache['controller_name'] = name = _controller_name(cls)
+        return name
+
+
+def _controller_name(cls) -> str:
     name = cls.__name__
     for suffix in getattr(cls, REMOVE_SUFFIXES_ATTR):
         if name.endswith(suffix):
@@ -35,6 +51,24 @@ def controller_name(cls) -> str:
     return snake_case(name)
 
 
+def parallel_map(fn: Callable, items: Iterable, workers=None) -> List:
+    """
+    Returns the results of calling fn with each of items, in the same order as
+    items. If workers is truthy, the calls get made on a thread pool (using
+    ``workers`` threads if it's an int, otherwise the executor's default).
+    """
+    if not workers:
+        return [fn(item) for item in items]
+
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+    max_workers = workers if type(workers) is int else None
+    context = contextvars.copy_context()  # (the workers don't inherit it)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda item: context.copy().run(fn, item),
+                                 items))
+
+
 def get_babel_bundle(bundles):
     if FlaskBabelBundle is None:
         return None
@@ -42,6 +76,26 @@ def get_babel_bundle(bundles):
     return babel_bundle[0] if babel_bundle else None
 
 
+def has_views(bundle) -> bool:
+    """
+    Returns whether or not any bundle in the bundle's class hierarchy has a
+    views module, like ``Bundle.has_views``, but without importing them (so
+    that lazily loaded views stay unimported).
+    """
+    import importlib.util
+    for bundle_cls in bundle.iter_class_hierarchy():
+        views_module_name = getattr(bundle_cls, 'views_module_name', 'views')
+        module_name = f'{bundle_cls.module_name}.{views_module_name}'
+        if module_name in sys.modules:
+            return True
+        try:
+            if importlib.util.find_spec(module_name) is not None:
+                return True
+        except (ImportError, ValueError):
+            pass
+    return False
+
+
 def get_param_tuples(url_rule) -> List[Tuple[str, str]]:
     if not url_rule:
         return []
@@ -87,38 +141,65 @@ def url_for(endpoint_or_url_or_config_key: str,
       request context is available. As of Werkzeug 0.10, this also can be set
       to an empty string to build protocol-relative URLs.
     """
-    what = endpoint_or_url_or_config_key
-
-    # if what is a config key
-    if what and what.isupper():
-        what = app.config.get(what)
-
-    if isinstance(what, LocalProxy):
-        what = what._get_current_object()
+    what, fallback = _resolve_url_for_target(endpoint_or_url_or_config_key,
+                                             _cls)
 
     # if we already have a url (or an invalid value, eg None)
     if not what or '/' in what:
         return what
 
+    # what must be an endpoint
     flask_url_for_kwargs = dict(_anchor=_anchor, _external=_external,
                                 _external_host=_external_host, _method=_method,
                                 _scheme=_scheme, **values)
+    try:
+        return _url_for(what, **flask_url_for_kwargs)
+    except BuildError:
+        if fallback is None:
+            raise
+    return _url_for(fallback, **flask_url_for_kwargs)
+
+
+def url_for_many(endpoint_or_url_or_config_key: str,
+                 values_list: Iterable[Dict[str, Any]],
+                 _anchor: Optional[str] = None,
+                 _cls: Optional[Union[object, type]] = None,
+                 _external: Optional[bool] = False,
+                 _external_host: Optional[str] = None,
+                 _method: Optional[str] = None,
+                 _scheme: Optional[str] = None,
+                 **values,
+                 ) -> List[Union[str, None]]:
+    """
+    Like :func:`url_for`, except it builds one url for each dictionary of url
+    values in ``values_list`` (eg the member links on a list page). The endpoint
+    only gets resolved once, and when possible, so does its url builder.
 
-    # check if it's a class method name, and try that endpoint
-    if _cls and '.' not in what:
-        controller_routes = getattr(_cls, CONTROLLER_ROUTES_ATTR)
-        method_routes = controller_routes.get(what)
+    :param endpoint_or_url_or_config_key: what to lookup (see :func:`url_for`)
+    :param values_list: the variable arguments of the URL rule for each url
+    :param values: variable arguments of the URL rule shared by every url
+    """
+    values_list = list(values_list)
+    what, fallback = _resolve_url_for_target(endpoint_or_url_or_config_key,
+                                             _cls)
+    if not what or '/' in what:
+        return [what] * len(values_list)
+
+    builder = get_url_builder(what)
+    urls = []
+    for item in values_list:
+        flask_url_for_kwargs = dict(_anchor=_anchor, _external=_external,
+                                    _external_host=_external_host,
+                                    _method=_method, _scheme=_scheme,
+                                    **{**values, **item})
         try:
-            return _url_for(method_routes[0].endpoint, **flask_url_for_kwargs)
-        except (
-            BuildError,  # url not found
-            IndexError,  # method_routes[0] is out-of-range
-            TypeError,   # method_routes is None
-        ):
-            pass
-
-    # what must be an endpoint
-    return _url_for(what, **flask_url_for_kwargs)
+            urls.append(_url_for(what, _builder=builder,
+                                 **flask_url_for_kwargs))
+        except BuildError:
+            if fallback is None:
+                raise
+            urls.append(_url_for(fallback, **flask_url_for_kwargs))
+    return urls
 
 
 def join(*args, trailing_slash=False):
@@ -127,8 +208,9 @@ def join(*args, trailing_slash=False):
 
     (correctly handles blank/None arguments, and removes back-to-back slashes)
     """
-    dirty_path = '/'.join(map(lambda x: x and x or '', args))
-    path = re.sub(r'/+', '/', dirty_path)
+    path = '/'.join(map(lambda x: x and x or '', args))
+    while '//' in path:  # (much faster than re.sub for long nested rules)
+        path = path.replace('//', '/')
     if path in {'', '/'}:
         return '/'
     path = path.rstrip('/')
@@ -180,26 +262,77 @@ def redirect(where: Optional[str] = None,
                                 _external_host=_external_host, _method=_method,
                                 _scheme=_scheme, **values)
 
-    urls = [url_for(request.args.get('next'), **flask_url_for_kwargs),
-            url_for(request.form.get('next'), **flask_url_for_kwargs)]
-    if where:
-        urls.append(url_for(where, _cls=_cls, **flask_url_for_kwargs))
-    if default:
-        urls.append(url_for(default, _cls=_cls, **flask_url_for_kwargs))
-    if override:
-        urls.insert(0, url_for(override, _cls=_cls, **flask_url_for_kwargs))
-
-    for url in urls:
+    # candidates are evaluated lazily, in order of precedence, so that once a
+    # valid url is found, no later urls get built (and for example, the request
+    # form doesn't get parsed unless it's actually needed)
+    def iter_urls():
+        if override:
+            yield url_for(override, _cls=_cls, **flask_url_for_kwargs)
+        yield url_for(request.args.get('next'), **flask_url_for_kwargs)
+        yield url_for(request.form.get('next'), **flask_url_for_kwargs)
+        if where:
+            yield url_for(where, _cls=_cls, **flask_url_for_kwargs)
+        if default:
+            yield url_for(default, _cls=_cls, **flask_url_for_kwargs)
+
+    for url in iter_urls():
         if _validate_redirect_url(url, _external_host):
             return flask_redirect(url)
     return flask_redirect('/')
 
 
+def _get_controller_method_endpoint(cls, method_name: str) -> Optional[str]:
+    """
+    Returns the registered endpoint for a controller's method, or None
+
+    (uses the index built by the routes hook when available, otherwise falls
+    back to the controller class's routes)
+    """
+    if not isinstance(cls, type):
+        cls = cls.__class__
+
+    store = app.extensions.get(EXTENSION_NAME)
+    if store is not None:
+        endpoint = store.controller_endpoints.get((cls, method_name))
+        if endpoint is not None:
+            return endpoint
+
+    method_routes = getattr(cls, CONTROLLER_ROUTES_ATTR).get(method_name)
+    if not method_routes:
+        return None
+    endpoint = method_routes[0].endpoint
+    return endpoint if endpoint in app.url_map._rules_by_endpoint else None
+
+
+def _resolve_url_for_target(what, _cls=None):
+    """
+    Returns a 2-tuple of (what, fallback), where fallback is the endpoint to try
+    if what is a controller method's endpoint that fails to build (else None)
+    """
+    # if what is a config key
+    if what and what.isupper():
+        what = app.config.get(what)
+
+    if isinstance(what, LocalProxy):
+        what = what._get_current_object()
+
+    # check if it's a class method name, and try that endpoint
+    if _cls and what and '/' not in what and '.' not in what:
+        endpoint = _get_controller_method_endpoint(_cls, what)
+        if endpoint is not None:
+            return endpoint, what
+
+    return what, None
+
+
 def _missing_to_default(arg, default=None):
     return arg if arg is not _missing else default
 
 
-def _url_for(endpoint: str, **values) -> Union[str, None]:
+def _url_for(endpoint: str,
+             _builder: Optional[UrlBuilder] = None,
+             **values,
+             ) -> Union[str, None]:
     """
     The same as flask's url_for, except this also supports building external
     urls for hosts that are different from app.config['SERVER_NAME']. One case
@@ -207,20 +340,62 @@ def _url_for(endpoint: str, **values) -> Union[str, None]:
     is not hosted by the same server as the backend, but the backend still needs
     to generate urls to frontend routes
 
+    Urls get built with the endpoint's compiled url builder when possible,
+    falling back to flask's url_for for anything the builder can't handle.
+
     :param endpoint: the name of the endpoint
     :param values: the variable arguments of the URL rule
+    :param _builder: the compiled url builder to use (if already known)
     :return: a url path, or None
     """
     _external_host = values.pop('_external_host', None)
     is_external = bool(_external_host or values.get('_external'))
     external_host = (_external_host or app.config.get('EXTERNAL_SERVER_NAME'))
     if not is_external or not external_host:
-        return flask_url_for(endpoint, **values)
+        return _build_url(endpoint, values, _builder)
 
     if '://' not in external_host:
         external_host = f'http://{external_host}'
     values.pop('_external')
-    return external_host.rstrip('/') + flask_url_for(endpoint, **values)
+    return external_host.rstrip('/') + _build_url(endpoint, values, _builder)
+
+
+def _build_url(endpoint: str,
+               values: Dict[str, Any],
+               builder: Optional[UrlBuilder] = None,
+               ) -> str:
+    url = build_url(endpoint, values, builder)
+    if url is not None:
+        return url
+    return flask_url_for(endpoint, **values)
+
+
+def build_redirect_allowlist(config) -> FrozenSet[str]:
+    """
+    Returns the set of hosts (netlocs) that redirects to absolute urls are
+    allowed to go to (besides the host of the current request), as configured
+    by ``EXTERNAL_SERVER_NAME`` and ``REDIRECT_ALLOWED_HOSTS``
+    """
+    hosts = [config.get('EXTERNAL_SERVER_NAME')]
+    hosts += config.get('REDIRECT_ALLOWED_HOSTS') or []
+    return frozenset(_host_to_netloc(host) for host in hosts if host)
+
+
+@functools.lru_cache(maxsize=128)
+def _host_to_netloc(host: str) -> str:
+    if '://' not in host:
+        host = f'http://{host}'
+    return urlsplit(host).netloc
+
+
+def _get_redirect_allowlist() -> FrozenSet[str]:
+    # normally built by the bundle at init time, but also built lazily for
+    # apps that aren't using the bundle
+    allowlist = app.extensions.get(REDIRECT_ALLOWLIST_EXTENSION_NAME)
+    if allowlist is None:
+        allowlist = build_redirect_allowlist(app.config)
+        app.extensions[REDIRECT_ALLOWLIST_EXTENSION_NAME] = allowlist
+    return allowlist
 
 
 # modified from flask_security.utils.validate_redirect_url
@@ -228,10 +403,10 @@ def _validate_redirect_url(url, _external_host=None):
     if url is None or url.strip() == '':
         return False
     url_next = urlsplit(url)
-    url_base = urlsplit(request.host_url)
-    external_host = _external_host or app.config.get('EXTERNAL_SERVER_NAME') or ''
-    if ((url_next.netloc or url_next.scheme)
-            and url_next.netloc != url_base.netloc
-            and url_next.netloc not in external_host):
-        return False
-    return True
+    if not (url_next.netloc or url_next.scheme):
+        return True
+    elif url_next.netloc == request.host:
+        return True
+    elif _external_host:
+        return url_next.netloc == _host_to_netloc(_external_host)
+    return url_next.netloc in _get_redirect_allowlist()
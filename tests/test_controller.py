@@ -1,7 +1,14 @@
+import asyncio
 import functools
-from flask import Blueprint
+import inspect
+import pytest
+import threading
+
+from flask import Blueprint, Flask, request
 
 from flask_controller_bundle import Controller
+from flask_controller_bundle.attr_constants import ASYNC_METHODS_ATTR
+from flask_controller_bundle.controller import FLASK_RUNS_ASYNC_VIEWS
 
 
 bp = Blueprint('bp', __name__, url_prefix='/bp')
@@ -126,6 +133,43 @@ class TestControllerAttributes:
         resp = controller.dispatch_request('my_method', 'a view arg')
         assert resp == ('a view arg', 'first', 'second', 'third',)
 
+    def test_dispatch_request_with_cached_decorators(self):
+        calls = []
+
+        def counting(fn):
+            calls.append(fn)
+            return fn
+
+        class FooController(Controller):
+            cache_decorators = True
+            decorators = (counting, first, second)
+
+            @third
+            def my_method(self, *args):
+                return args
+
+        controller = FooController()
+        resp = controller.dispatch_request('my_method')
+        assert resp == ('first', 'second', 'third')
+
+        resp = FooController().dispatch_request('my_method', 'a view arg')
+        assert resp == ('a view arg', 'first', 'second', 'third')
+        assert len(calls) == 1
+
+    def test_cached_decorators_are_per_class(self):
+        class FooController(Controller):
+            cache_decorators = True
+            decorators = (first,)
+
+            def my_method(self, *args):
+                return args
+
+        class BarController(FooController):
+            decorators = (second,)
+
+        assert FooController().dispatch_request('my_method') == ('first',)
+        assert BarController().dispatch_request('my_method') == ('second',)
+
     def test_method_as_view(self):
         class FooController(Controller):
             decorators = (first, second)
@@ -141,6 +185,189 @@ class TestControllerAttributes:
         assert view.__doc__ == 'my_method docstring'
         assert view.__module__ == FooController.__module__
 
+    def test_method_as_view_creates_an_instance_per_request(self):
+        class FooController(Controller):
+            def my_method(self):
+                return self
+
+        view = FooController.method_as_view('my_method')
+        assert view() is not view()
+
+    def test_method_as_view_reuses_instance_per_process(self, app):
+        class FooController(Controller):
+            reuse_instance = 'process'
+
+            def my_method(self):
+                return self
+
+        view = FooController.method_as_view('my_method')
+        instance = view()
+        assert isinstance(instance, FooController)
+        assert view() is instance
+
+        def in_thread():
+            with app.app_context():
+                thread_instances.append(view())
+
+        thread_instances = []
+        thread = threading.Thread(target=in_thread)
+        thread.start()
+        thread.join()
+        assert thread_instances == [instance]
+
+    def test_method_as_view_reuses_instance_per_thread(self):
+        class FooController(Controller):
+            reuse_instance = 'thread'
+
+            def my_method(self):
+                return self
+
+        view = FooController.method_as_view('my_method')
+        instance = view()
+        assert view() is instance
+
+        thread_instances = []
+        thread = threading.Thread(target=lambda: thread_instances.append(view()))
+        thread.start()
+        thread.join()
+        assert isinstance(thread_instances[0], FooController)
+        assert thread_instances[0] is not instance
+
+    def test_reused_instance_is_shared_by_view_methods(self):
+        class FooController(Controller):
+            reuse_instance = 'process'
+
+            def __init__(self, name=None):
+                self.name = name
+
+            def one(self):
+                return self
+
+            def two(self):
+                return self
+
+        instance = FooController.method_as_view('one')()
+        assert FooController.method_as_view('two')() is instance
+        assert FooController.method_as_view('one')() is instance
+
+        named = FooController.method_as_view('one', name='named')()
+        assert named is not instance
+        assert named.name == 'named'
+        assert FooController.method_as_view('two', name='named')() is named
+
+    def test_reused_instance_is_shared_by_view_methods_per_thread(self):
+        class FooController(Controller):
+            reuse_instance = 'thread'
+
+            def one(self):
+                return self
+
+            def two(self):
+                return self
+
+        instance = FooController.method_as_view('one')()
+        assert FooController.method_as_view('two')() is instance
+
+    @pytest.mark.parametrize('reuse', ['process', 'thread'])
+    def test_reused_instances_are_per_app(self, app, reuse):
+        class FooController(Controller):
+            reuse_instance = reuse
+
+            def my_method(self):
+                return self
+
+        view = FooController.method_as_view('my_method')
+        instance = view()
+        with Flask(__name__).app_context():
+            other_instance = view()
+        assert isinstance(other_instance, FooController)
+        assert other_instance is not instance
+        assert view() is instance
+
+    def test_method_as_view_with_invalid_reuse_instance(self):
+        class FooController(Controller):
+            reuse_instance = 'request'
+
+            def my_method(self):
+                pass
+
+        with pytest.raises(ValueError):
+            FooController.method_as_view('my_method')
+
+    def test_it_detects_async_methods(self):
+        class FooController(Controller):
+            async def my_async_method(self):
+                pass
+
+            @third
+            async def my_decorated_async_method(self):
+                pass
+
+            def my_method(self):
+                pass
+
+        assert getattr(FooController, ASYNC_METHODS_ATTR) == {
+            'my_async_method', 'my_decorated_async_method'}
+
+        class BarController(FooController):
+            def my_async_method(self):
+                pass
+
+        assert getattr(BarController, ASYNC_METHODS_ATTR) == {
+            'my_decorated_async_method'}
+
+    def test_method_as_view_with_async_method(self):
+        class FooController(Controller):
+            decorators = (first, second)
+
+            async def my_method(self, *args):
+                """my_method docstring"""
+                return args
+
+        view = FooController.method_as_view('my_method')
+        assert inspect.iscoroutinefunction(view) == FLASK_RUNS_ASYNC_VIEWS
+        assert view.__name__ == 'my_method'
+        assert view.__doc__ == 'my_method docstring'
+
+        if not FLASK_RUNS_ASYNC_VIEWS:
+            assert view() == ('first', 'second')
+            return
+
+        loop = asyncio.new_event_loop()
+        try:
+            assert loop.run_until_complete(view()) == ('first', 'second')
+        finally:
+            loop.close()
+
+    def test_async_method_dispatched_by_flask(self):
+        class FooController(Controller):
+            async def index(self):
+                await asyncio.sleep(0)
+                return 'async index'
+
+        flask_app = Flask(__name__)
+        flask_app.add_url_rule('/', 'index',
+                               FooController.method_as_view('index'))
+        response = flask_app.test_client().get('/')
+        assert response.status_code == 200
+        assert response.get_data(as_text=True) == 'async index'
+
+    def test_method_as_view_with_async_decorator(self):
+        def async_decorator(fn):
+            async def wrapper(*args):
+                return fn(*(list(args) + ['async']))
+            return wrapper
+
+        class FooController(Controller):
+            decorators = (async_decorator, first)
+
+            def my_method(self, *args):
+                return args
+
+        view = FooController.method_as_view('my_method')
+        assert not inspect.iscoroutinefunction(view)
+        assert view() == ('async', 'first')
+
     def test_render(self, templates):
         controller = DefaultController()
 
@@ -249,6 +476,22 @@ class TestControllerAttributes:
             assert resp.location == '/my-path'
             monkeypatch.undo()
 
+    def test_redirect_does_not_evaluate_later_candidates(self, app,
+                                                         monkeypatch):
+        controller = DefaultController()
+
+        def fail():
+            raise AssertionError('should not be evaluated')
+
+        with app.test_request_context(method='POST'):
+            monkeypatch.setattr('flask.request.args', {'next': '/path'})
+            monkeypatch.setattr(type(request._get_current_object()), 'form',
+                                property(lambda self: fail()))
+            resp = controller.redirect('not.an.endpoint')
+            assert resp.status_code == 302
+            assert resp.location == '/path'
+            monkeypatch.undo()
+
     def test_redirect_with_endpoint(self, app):
         controller = DefaultController()
 
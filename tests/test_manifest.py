@@ -0,0 +1,188 @@
+import os
+import pytest
+import sys
+import warnings
+
+from flask import Blueprint, Flask
+from flask_controller_bundle import func, url_for
+from flask_controller_bundle.hooks import (
+    RegisterBlueprintsHook, RegisterBundleTemplateFoldersHook,
+    RegisterRoutesHook, Store)
+from flask_controller_bundle.manifest import (
+    LazyView, ManifestError, load_manifest, read_manifest, write_manifest)
+from flask_unchained import AppFactory, TEST
+from flask_unchained.unchained import Unchained
+
+from .fixtures.auto_route_app_bundle import AutoRouteAppBundle
+from .fixtures.vendor_bundle import VendorBundle
+
+
+@pytest.fixture
+def hook():
+    return RegisterRoutesHook(Unchained(), Store())
+
+
+@pytest.fixture
+def manifest_path(tmpdir):
+    return str(tmpdir.join('routes.json'))
+
+
+class TestManifest:
+    def test_it_round_trips_routes(self, app, hook, manifest_path):
+        hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+        routes = list(hook.store.endpoints.values())
+        write_manifest(manifest_path, routes)
+
+        loaded = load_manifest(manifest_path)
+        assert [route.endpoint for route in loaded] == \
+            [route.endpoint for route in routes]
+        for route, loaded_route in zip(routes, loaded):
+            assert loaded_route.full_rule == route.full_rule
+            assert loaded_route.methods == route.methods
+            assert loaded_route.defaults == route.defaults
+            assert loaded_route.rule_options == route.rule_options
+            assert loaded_route.full_name == route.full_name
+            assert loaded_route.view_func() == route.view_func()
+
+    def test_it_loads_lazy_views(self, app, hook, manifest_path):
+        hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+        write_manifest(manifest_path, hook.store.endpoints.values())
+
+        views_module_name = 'tests.fixtures.auto_route_app_bundle.views'
+        del sys.modules[views_module_name]
+        routes = load_manifest(manifest_path, lazy_views=True)
+        assert views_module_name not in sys.modules
+
+        lazy_app = Flask(__name__)
+        for route in routes:
+            lazy_app.add_url_rule(route.full_rule,
+                                  endpoint=route.endpoint,
+                                  methods=route.methods,
+                                  view_func=route.view_func)
+        with lazy_app.test_request_context():
+            assert url_for('site_controller.about') == '/about'
+        assert views_module_name not in sys.modules
+
+        index = lazy_app.view_functions['site_controller.index']
+        assert isinstance(index, LazyView)
+        assert not index.is_resolved
+        assert lazy_app.test_client().get('/').data == b'index rendered'
+        assert index.is_resolved
+        assert views_module_name in sys.modules
+
+    def test_it_detects_stale_manifests(self, app, hook, manifest_path):
+        hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+        write_manifest(manifest_path, hook.store.endpoints.values())
+        assert load_manifest(manifest_path) is not None
+
+        source = read_manifest(manifest_path)['sources'][0]
+        stat = os.stat(source)
+        try:
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            assert load_manifest(manifest_path) is None
+        finally:
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    def test_it_is_only_used_in_the_same_environment(self, app, hook,
+                                                      manifest_path):
+        hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+        write_manifest(manifest_path, hook.store.endpoints.values(),
+                       environment='production')
+        assert load_manifest(manifest_path, environment='production')
+        assert load_manifest(manifest_path, environment='development') is None
+        assert load_manifest(manifest_path) is None
+
+    def test_it_ignores_missing_or_invalid_manifests(self, manifest_path):
+        assert load_manifest(manifest_path) is None
+
+        with open(manifest_path, 'w') as f:
+            f.write('{"version": 0}')
+        assert load_manifest(manifest_path) is None
+
+    def test_it_requires_importable_views(self, manifest_path):
+        def local_view():
+            pass
+
+        routes = [route.freeze() for route in func('/local', local_view)]
+        with pytest.raises(ManifestError):
+            write_manifest(manifest_path, routes)
+
+
+class TestRegisterRoutesHookWithManifest:
+    def test_it_writes_and_loads_the_manifest(self, app, manifest_path):
+        app.config['ROUTES_MANIFEST'] = manifest_path
+        hook = RegisterRoutesHook(Unchained(), Store())
+        with app.test_request_context():
+            hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+        assert os.path.exists(manifest_path)
+        expected = list(hook.store.endpoints.keys())
+
+        app = AppFactory.create_app(TEST)
+        app.config['ROUTES_MANIFEST'] = manifest_path
+        hook = RegisterRoutesHook(Unchained(), Store())
+        hook.process_objects = None  # routes should not get rediscovered
+        with app.test_request_context():
+            hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+            assert list(hook.store.endpoints.keys()) == expected
+            route = hook.store.endpoints['site_controller.index']
+            assert route.view_func() == 'index rendered'
+
+    def test_it_does_not_write_manifests_for_route_predicates(
+            self, app, manifest_path):
+        from .fixtures.views import simple
+        hook = RegisterRoutesHook(Unchained(), Store())
+        hook.babel_bundle = None
+        with app.test_request_context():
+            hook.process_objects(app, [
+                func('/simple', simple, only_if=lambda app: True)])
+            with pytest.warns(UserWarning, match='only_if'):
+                hook.write_manifest(manifest_path, [VendorBundle])
+        assert not os.path.exists(manifest_path)
+
+    def test_it_only_adds_blueprints_for_lazy_views(self, app, manifest_path):
+        bp = Blueprint('bp', __name__)
+
+        @bp.route('/bp')
+        def bp_view():
+            return 'bp_view rendered'
+
+        write_manifest(manifest_path, [], environment=app.env)
+        app.config['ROUTES_MANIFEST'] = manifest_path
+        hook = RegisterBlueprintsHook(Unchained(), Store())
+        hook.collect_from_bundles = lambda bundles: [bp]
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+        assert 'bp' in app.blueprints
+        assert 'blueprints' not in read_manifest(manifest_path, app.env)
+
+    def test_lazy_views_are_not_imported_by_any_hook(self, app, manifest_path,
+                                                     monkeypatch):
+        def run_hooks(app):
+            unchained, store = Unchained(), Store()
+            hooks = [RegisterRoutesHook(unchained, store),
+                     RegisterBundleTemplateFoldersHook(unchained, store),
+                     RegisterBlueprintsHook(unchained, store)]
+            with app.test_request_context():
+                for hook in hooks:
+                    hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+
+        app.config['ROUTES_MANIFEST'] = manifest_path
+        app.config['ROUTES_MANIFEST_LAZY_VIEWS'] = True
+        run_hooks(app)
+        assert 'blueprints' in read_manifest(manifest_path, app.env)
+
+        views_module_names = ['tests.fixtures.auto_route_app_bundle.views',
+                              'tests.fixtures.vendor_bundle.views']
+        for module_name in views_module_names:
+            monkeypatch.delitem(sys.modules, module_name)
+
+        app = AppFactory.create_app(TEST)
+        app.config['ROUTES_MANIFEST'] = manifest_path
+        app.config['ROUTES_MANIFEST_LAZY_VIEWS'] = True
+        run_hooks(app)
+        for module_name in views_module_names:
+            assert module_name not in sys.modules
+        assert {'three', 'four'} <= set(app.blueprints)
+
+        assert app.test_client().get('/').data == b'index rendered'
@@ -41,3 +41,9 @@ class TestRegisterBlueprintsHook:
         # within bundles, earlier blueprints override later ones
         hook.run_hook(app, [VendorBundle, AppBundle])
         assert list(app.iter_blueprints()) == [one, two, three, four]
+
+    def test_run_hook_with_parallel_discovery(self, app,
+                                              hook: RegisterBlueprintsHook):
+        app.config['PARALLEL_BUNDLE_DISCOVERY'] = 4
+        hook.run_hook(app, [VendorBundle, AppBundle])
+        assert list(app.iter_blueprints()) == [one, two, three, four]
@@ -1,6 +1,8 @@
 import pytest
 from types import GeneratorType
 
+from flask_controller_bundle import func
+from flask_controller_bundle.constants import EXTENSION_NAME
 from flask_controller_bundle.hooks import RegisterRoutesHook, Store
 from flask_unchained.unchained import Unchained
 
@@ -75,3 +77,44 @@ class TestRegisterRoutesHook:
             for endpoint in expected:
                 view_func = app.view_functions[endpoint]
                 assert view_func() == expected[endpoint]
+
+    def test_run_hook_builds_controller_endpoints_index(self, app, hook):
+        with app.test_request_context():
+            hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+
+            from .fixtures.auto_route_app_bundle.views import SiteController
+            assert hook.store.controller_endpoints == {
+                (SiteController, 'index'): 'site_controller.index',
+                (SiteController, 'about'): 'site_controller.about',
+            }
+            assert app.extensions[EXTENSION_NAME] is hook.store
+
+    def test_get_owning_bundle_name(self, hook):
+        prefixes = {'app': 'app',
+                    'vendor_bundle': 'vendor_bundle',
+                    'vendor_bundle.nested': 'nested_bundle'}
+
+        assert hook.get_owning_bundle_name('app.views', prefixes) == 'app'
+        assert hook.get_owning_bundle_name('vendor_bundle.views',
+                                           prefixes) == 'vendor_bundle'
+        assert hook.get_owning_bundle_name('vendor_bundle.nested.views',
+                                           prefixes) == 'nested_bundle'
+        assert hook.get_owning_bundle_name('vendor_bundle_two.views',
+                                           prefixes) is None
+        assert hook.get_owning_bundle_name('other.views', prefixes) is None
+        assert hook.get_owning_bundle_name(None, prefixes) is None
+
+    def test_process_objects_warns_about_conflicts(self, app, hook):
+        def view():
+            pass
+
+        routes = [func('/users', view, endpoint='users'),
+                  func('/users', view, endpoint='people'),
+                  func('/people', view, endpoint='people')]
+        hook.babel_bundle = None
+        with pytest.warns(UserWarning) as record:
+            hook.process_objects(app, routes)
+        messages = [str(warning.message) for warning in record]
+        assert len(messages) == 2
+        assert 'duplicates the same rule of users' in messages[0]
+        assert 'endpoint people is used by more than one route' in messages[1]
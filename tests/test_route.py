@@ -1,8 +1,10 @@
 import pytest
 
+from flask import Blueprint
 from flask_controller_bundle import Controller
 from flask_controller_bundle.attr_constants import CONTROLLER_ROUTES_ATTR
-from flask_controller_bundle.route import Route
+from flask_controller_bundle.route import (
+    FinalRoute, Route, filter_routes_to_register)
 
 
 class TestRoute:
@@ -19,6 +21,45 @@ class TestRoute:
         assert route.should_register(True) is True
         assert route.should_register(False) is False
 
+    def test_should_register_caches_predicate_results(self):
+        calls = []
+
+        def only_if(app):
+            calls.append(app)
+            return app
+
+        route = Route('/path', lambda: 'view_func', only_if=only_if)
+        other_route = Route('/other', lambda: 'view_func', only_if=only_if)
+        results = {}
+        assert route.should_register(True, results) is True
+        assert other_route.should_register(True, results) is True
+        assert calls == [True]
+
+        assert route.should_register(False) is False
+        assert calls == [True, False]
+
+    def test_filter_routes_to_register(self):
+        calls = []
+
+        def enabled(app):
+            calls.append('enabled')
+            return True
+
+        def disabled(app):
+            calls.append('disabled')
+            return False
+
+        routes = [Route(f'/{i}', lambda: 'view_func',
+                        only_if=enabled if i % 2 else disabled)
+                  for i in range(10)]
+        routes.append(Route('/always', lambda: 'view_func'))
+        routes.append(Route('/never', lambda: 'view_func', only_if=False))
+
+        registered = filter_routes_to_register(routes, None)
+        assert [route.rule for route in registered] == [
+            '/1', '/3', '/5', '/7', '/9', '/always']
+        assert sorted(calls) == ['disabled', 'enabled']
+
     def test_full_rule_requires_rule_with_a_controller(self):
         class SomeController(Controller):
             def index(self):
@@ -43,3 +84,36 @@ class TestRoute:
 
         route = Route('/foo', a_view)
         assert route.full_name == 'tests.test_route.a_view'
+
+    def test_freeze(self):
+        def a_view():
+            pass
+
+        bp = Blueprint('bp', __name__, url_prefix='/bp')
+        route = Route('/foo', a_view, blueprint=bp, methods=['POST'],
+                      only_if=True, strict_slashes=False)
+        frozen = route.freeze()
+        assert isinstance(frozen, FinalRoute)
+        assert frozen.freeze() is frozen
+        assert not hasattr(frozen, '__dict__')
+
+        for attr in FinalRoute.__slots__:
+            assert getattr(frozen, attr) == getattr(route, attr)
+        assert frozen.full_rule == '/bp/foo'
+        assert frozen.endpoint == 'bp.a_view'
+        assert frozen.rule_options == {'strict_slashes': False}
+        assert frozen.should_register(None) is True
+
+    def test_module_name_is_cached_until_view_func_changes(self):
+        def a_view():
+            pass
+
+        route = Route('/foo', a_view)
+        assert route.module_name == 'tests.test_route'
+
+        a_view.__module__ = 'something.else'
+        assert route.module_name == 'tests.test_route'
+
+        route.view_func = a_view
+        assert route.module_name == 'something.else'
+        assert route.copy().module_name == 'something.else'
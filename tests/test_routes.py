@@ -1,4 +1,7 @@
 import pytest
+import sys
+import threading
+import time
 
 from flask import Blueprint
 
@@ -7,7 +10,8 @@ from flask_controller_bundle.attr_constants import (
     CONTROLLER_ROUTES_ATTR, FN_ROUTES_ATTR)
 from flask_controller_bundle.decorators import route as route_decorator
 from flask_controller_bundle.routes import (
-    controller, func, include, resource, _normalize_args)
+    controller, func, include, prefix, reduce_routes, resource,
+    _get_module_routes, _normalize_args)
 
 
 bp = Blueprint('test', __name__)
@@ -107,6 +111,18 @@ class TestController:
         assert orig_routes[0].rule == '/'
         assert routes[0].rule == '/prefix'
 
+    def test_it_does_not_mutate_the_controller_cls(self):
+        first = controller('/first', SiteController)
+        second = controller('/second', SiteController)
+
+        # interleave the generators, as concurrently building apps would
+        rules = []
+        for first_route, second_route in zip(first, second):
+            assert SiteController.url_prefix is None
+            rules += [first_route.rule, second_route.rule]
+        assert rules == ['/first', '/second', '/first/about', '/second/about']
+        assert 'url_prefix' not in vars(SiteController)
+
 
 class TestFunc:
     def test_it_works_with_undecorated_view(self):
@@ -214,8 +230,120 @@ class TestInclude:
         assert routes[0].endpoint == 'views.one'
         assert routes[1].endpoint == 'views.two'
 
+    def test_it_replays_routes_without_reimporting(self):
+        first = list(include('tests.fixtures.other_routes'))
+        module = sys.modules['tests.fixtures.other_routes']
+
+        second = list(include('tests.fixtures.other_routes'))
+        assert sys.modules['tests.fixtures.other_routes'] is module
+        assert [r.endpoint for r in second] == [r.endpoint for r in first]
+        assert all(a is not b for a, b in zip(first, second))
+
+    def test_replayed_routes_get_new_controller_view_funcs(self):
+        routes = [controller('/', SiteController),
+                  func('/four', undecorated_view, endpoint='four')]
+        first = _get_module_routes('replayed', 'routes', routes)
+        second = _get_module_routes('replayed', 'routes', routes)
+        assert [r.endpoint for r in second] == [r.endpoint for r in first]
+
+        for a, b in zip(first[:-1], second[:-1]):
+            assert b.view_func is not a.view_func
+            assert b.view_func.view_class is SiteController
+            assert b.view_func.__name__ == a.view_func.__name__
+        assert second[-1].view_func is first[-1].view_func
+
+    def test_it_reduces_module_routes_once_for_concurrent_includes(self):
+        def slow_routes():
+            for endpoint in ('one', 'two', 'three'):
+                time.sleep(0.01)
+                yield from func(f'/{endpoint}', undecorated_view,
+                                endpoint=endpoint)
+
+        routes = [slow_routes()]
+        barrier = threading.Barrier(4)
+        results, errors = [], []
+
+        def include_routes():
+            barrier.wait()
+            try:
+                results.append(_get_module_routes('concurrent', 'routes',
+                                                  routes))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=include_routes) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert [[r.endpoint for r in result] for result in results] == \
+            [['one', 'two', 'three']] * 4
+
+    def test_it_can_reduce_top_level_routes_in_parallel(self):
+        def make_routes():
+            return [include('tests.fixtures.other_routes', attr='explicit'),
+                    func('/four', undecorated_view, endpoint='four'),
+                    include('tests.fixtures.other_routes', attr='recursive')]
+
+        serial = _get_module_routes('serial', 'routes', make_routes())
+        parallel = _get_module_routes('parallel', 'routes', make_routes(),
+                                      workers=4)
+        assert [(r.endpoint, r.rule) for r in parallel] == \
+            [(r.endpoint, r.rule) for r in serial]
+        assert len(parallel) == 10
+
+    def test_it_reimports_when_asked_to(self):
+        list(include('tests.fixtures.other_routes'))
+        module = sys.modules['tests.fixtures.other_routes']
+
+        routes = list(include('tests.fixtures.other_routes', reload=True))
+        assert sys.modules['tests.fixtures.other_routes'] is not module
+        assert len(routes) == 3
+
+
+class TestReduceRoutes:
+    def test_it_works_with_empty_routes(self):
+        assert list(reduce_routes([])) == []
+        assert list(reduce_routes(None)) == []
+        assert list(reduce_routes([[], None, iter([])])) == []
+
+    def test_it_flattens_in_order(self):
+        routes = list(reduce_routes([
+            func('/one', undecorated_view, endpoint='one'),
+            [[func('/two', undecorated_view, endpoint='two')],
+             func('/three', undecorated_view, endpoint='three')],
+            [],
+            func('/four', undecorated_view, endpoint='four'),
+        ]))
+        assert [route.endpoint for route in routes] == [
+            'one', 'two', 'three', 'four']
+
+    def test_it_works_with_deeply_nested_routes(self):
+        routes = [func('/leaf', undecorated_view)]
+        for _ in range(sys.getrecursionlimit() * 2):
+            routes = [routes]
+        assert [route.rule for route in reduce_routes(routes)] == ['/leaf']
+
+        routes = func('/leaf', undecorated_view)
+        for _ in range(100):
+            routes = prefix('/p', [routes])
+        rule = list(reduce_routes(routes))[0].rule
+        assert rule == '/p' * 100 + '/leaf'
+
 
 class TestResource:
+    def test_it_does_not_mutate_the_resource_cls(self):
+        routes = resource('/prefix', UserResource,
+                          subresources=[resource(RoleResource)])
+        assert [route.rule for route in routes] == [
+            '/prefix', '/prefix/<int:id>',
+            '/prefix/<int:user_id>/roles',
+            '/prefix/<int:user_id>/roles/<int:id>']
+        assert UserResource.url_prefix == '/users'
+        assert 'url_prefix' not in vars(UserResource)
+
     def test_it_works_with_only_resource(self):
         routes = list(resource(UserResource))
         assert len(routes) == 2
@@ -0,0 +1,59 @@
+from flask_controller_bundle.route import Route
+from flask_controller_bundle.rule_trie import (
+    DUPLICATE, ENDPOINT, SHADOWED, find_route_conflicts, get_rule_key)
+
+
+def view():
+    pass
+
+
+def make_route(rule, endpoint, methods=None, **rule_options):
+    return Route(rule, view, endpoint=endpoint, methods=methods,
+                 **rule_options).freeze()
+
+
+class TestGetRuleKey:
+    def test_it_normalizes_variable_names(self):
+        assert get_rule_key(make_route('/users/<int:id>', 'a')) == \
+            get_rule_key(make_route('/users/<int:user_id>', 'b'))
+        assert get_rule_key(make_route('/<name>', 'a')) == \
+            get_rule_key(make_route('/<string:slug>', 'b'))
+
+    def test_it_keeps_converters_and_static_parts_distinct(self):
+        keys = [get_rule_key(make_route(rule, 'a')) for rule in [
+            '/users/<int:id>', '/users/<id>', '/users/<int(min=1):id>',
+            '/users/user-<int:id>', '/users/<int:id>/edit', '/users/new']]
+        assert len({tuple(key) for key in keys}) == len(keys)
+
+
+class TestFindRouteConflicts:
+    def test_it_finds_nothing_for_valid_routes(self):
+        assert find_route_conflicts([
+            make_route('/users', 'users.list'),
+            make_route('/users', 'users.create', methods=['POST']),
+            make_route('/users/<int:id>', 'users.get'),
+            make_route('/users/<id>', 'users.by_name'),
+            make_route('/users/new', 'users.new'),
+            make_route('/users', 'api.users', subdomain='api'),
+        ]) == []
+
+    def test_it_finds_duplicates(self):
+        first = make_route('/users', 'users.list')
+        second = make_route('/users', 'users.index', methods=['GET', 'POST'])
+        conflicts = find_route_conflicts([first, second])
+        assert [(c.kind, c.route, c.existing) for c in conflicts] == [
+            (DUPLICATE, second, first)]
+
+    def test_it_finds_shadowed_rules(self):
+        first = make_route('/users/<int:id>', 'users.get')
+        second = make_route('/users/<int:user_id>', 'users.detail')
+        conflicts = find_route_conflicts([first, second])
+        assert [(c.kind, c.route, c.existing) for c in conflicts] == [
+            (SHADOWED, second, first)]
+
+    def test_it_finds_endpoint_collisions(self):
+        first = make_route('/users', 'users')
+        second = make_route('/people', 'users')
+        conflicts = find_route_conflicts([first, second])
+        assert [(c.kind, c.route, c.existing) for c in conflicts] == [
+            (ENDPOINT, second, first)]
@@ -0,0 +1,343 @@
+import os
+import pytest
+
+from flask import Blueprint, Flask
+from jinja2 import TemplateNotFound, TemplateSyntaxError
+
+from flask_controller_bundle.commands import precompile_templates_command
+from flask_controller_bundle.template_loader import (
+    TemplateIndex, UnchainedBytecodeCache, UnchainedJinjaEnvironment,
+    UnchainedJinjaLoader, get_stable_path, get_template_index,
+    get_template_loading_explanations, make_template_override,
+    precompile_templates, pretty_num)
+
+
+def write_template(folder, name, contents):
+    path = os.path.join(folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(contents)
+    return path
+
+
+def write_binary(folder, name, contents):
+    path = os.path.join(folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(contents)
+    return path
+
+
+@pytest.fixture()
+def loader_app(tmpdir):
+    folders = [str(tmpdir.mkdir(name)) for name in ('app', 'one', 'two')]
+    app = Flask('tests', template_folder=folders[0])
+    app.jinja_environment = UnchainedJinjaEnvironment
+    app.jinja_options = {**app.jinja_options,
+                         'loader': UnchainedJinjaLoader(app)}
+    for name, folder in zip(('one', 'two'), folders[1:]):
+        app.register_blueprint(Blueprint(name, __name__,
+                                         template_folder=folder))
+    app.folders = folders
+    return app
+
+
+class CountingLoaders:
+    def __init__(self, loader, monkeypatch):
+        self.calls = []
+        for srcobj, child in loader._iter_loaders(None):
+            monkeypatch.setattr(child, 'get_source',
+                                self._wrap(srcobj, child.get_source))
+
+    def _wrap(self, srcobj, get_source):
+        def wrapped(environment, template):
+            self.calls.append(srcobj.name)
+            return get_source(environment, template)
+        return wrapped
+
+
+class TestUnchainedJinjaLoader:
+    def test_resolves_overrides_by_depth(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        write_template(one, 'site/index.html', 'one')
+        write_template(two, 'site/index.html', 'two')
+        loader = loader_app.jinja_env.loader
+        env = loader_app.jinja_env
+
+        assert loader.get_source(env, 'site/index.html')[0] == 'one'
+        override = make_template_override('site/index.html', 0)
+        assert loader.get_source(env, override)[0] == 'two'
+        with pytest.raises(TemplateNotFound):
+            loader.get_source(env, make_template_override(override, 1))
+
+    def test_caches_the_winning_loader(self, loader_app, monkeypatch):
+        app_folder, one, two = loader_app.folders
+        path = write_template(two, 'site/index.html', 'two')
+        loader = loader_app.jinja_env.loader
+        env = loader_app.jinja_env
+        env.auto_reload = False
+        counting = CountingLoaders(loader, monkeypatch)
+
+        assert loader.get_source(env, 'site/index.html')[0] == 'two'
+        assert counting.calls == ['tests', 'one', 'two']
+        assert loader._resolutions[('site/index.html', 0)].filename == path
+
+        counting.calls.clear()
+        assert loader.get_source(env, 'site/index.html')[0] == 'two'
+        assert counting.calls == ['two']
+
+    def test_auto_reload_picks_up_new_overrides(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        write_template(two, 'site/index.html', 'two')
+        loader = loader_app.jinja_env.loader
+        env = loader_app.jinja_env
+        env.auto_reload = True
+
+        assert loader.get_source(env, 'site/index.html')[0] == 'two'
+        write_template(one, 'site/index.html', 'one')
+        assert loader.get_source(env, 'site/index.html')[0] == 'one'
+
+    def test_removed_templates_get_resolved_again(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        path = write_template(one, 'site/index.html', 'one')
+        write_template(two, 'site/index.html', 'two')
+        loader = loader_app.jinja_env.loader
+        env = loader_app.jinja_env
+        env.auto_reload = False
+
+        assert loader.get_source(env, 'site/index.html')[0] == 'one'
+        os.remove(path)
+        assert loader.get_source(env, 'site/index.html')[0] == 'two'
+
+    def test_clear_cache(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        write_template(two, 'site/index.html', 'two')
+        loader = loader_app.jinja_env.loader
+        loader.get_source(loader_app.jinja_env, 'site/index.html')
+        assert loader._resolutions
+
+        loader.clear_cache()
+        assert not loader._resolutions
+
+
+class TestTemplateIndex:
+    def test_override_chains(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        write_template(app_folder, 'site/index.html', 'app')
+        write_template(two, 'site/index.html', 'two')
+        write_template(one, 'site/about.html', 'one')
+        loader = loader_app.jinja_env.loader
+
+        index = loader.build_index()
+        assert get_template_index(loader_app) is index
+        assert index.list_templates() == ['site/about.html', 'site/index.html']
+        assert [source.srcobj.name for source
+                in index.get_chain('site/index.html')] == ['tests', 'two']
+        assert index.get('site/index.html', 1).filename == os.path.join(
+            two, 'site', 'index.html')
+        assert index.get('site/index.html', 2) is None
+        assert [template for template, chain in index.iter_overrides()] == [
+            'site/index.html']
+
+    def test_loader_answers_from_the_index(self, loader_app, monkeypatch):
+        app_folder, one, two = loader_app.folders
+        write_template(one, 'site/index.html', 'one')
+        write_template(two, 'site/index.html', 'two')
+        loader = loader_app.jinja_env.loader
+        env = loader_app.jinja_env
+        env.auto_reload = False
+        loader.build_index()
+        counting = CountingLoaders(loader, monkeypatch)
+
+        override = make_template_override('site/index.html', 0)
+        assert loader.get_source(env, override)[0] == 'two'
+        assert counting.calls == ['two']
+        with pytest.raises(TemplateNotFound):
+            loader.get_source(env, 'site/missing.html')
+        assert counting.calls == ['two', 'tests', 'one', 'two']
+
+    def test_templates_from_late_blueprints(self, loader_app, tmpdir):
+        loader = loader_app.jinja_env.loader
+        loader_app.jinja_env.auto_reload = False
+        loader.build_index()
+
+        late = str(tmpdir.mkdir('late'))
+        write_template(late, 'late/index.html', 'late')
+        loader_app.register_blueprint(Blueprint('late', __name__,
+                                                template_folder=late))
+        assert loader.get_source(loader_app.jinja_env,
+                                 'late/index.html')[0] == 'late'
+
+    def test_not_built_for_other_loaders(self):
+        from jinja2 import DictLoader
+        assert TemplateIndex.from_loaders([(None, DictLoader({}))]) is None
+
+    def test_built_after_init_app(self):
+        from flask_controller_bundle import FlaskControllerBundle
+        app = Flask('tests', template_folder=os.path.join(
+            os.path.dirname(__file__), 'templates'))
+        FlaskControllerBundle.before_init_app(app)
+        FlaskControllerBundle.after_init_app(app)
+
+        index = get_template_index(app)
+        assert index is not None
+        assert 'site/index.html' in index
+
+
+class TestUnchainedBytecodeCache:
+    def test_keys_are_stable_across_deploy_paths(self, tmpdir, monkeypatch):
+        cache = UnchainedBytecodeCache(str(tmpdir))
+        old, new = str(tmpdir.mkdir('old')), str(tmpdir.mkdir('new'))
+        monkeypatch.setattr('sys.path', [old, new])
+
+        old_key = cache.get_cache_key(
+            'site/index.html', os.path.join(old, 'app', 'site', 'index.html'))
+        new_key = cache.get_cache_key(
+            'site/index.html', os.path.join(new, 'app', 'site', 'index.html'))
+        assert old_key == new_key
+
+    def test_keys_include_override_depth(self, tmpdir):
+        cache = UnchainedBytecodeCache(str(tmpdir))
+        override = make_template_override('site/index.html', 0)
+        filename = os.path.join(str(tmpdir), 'site', 'index.html')
+        assert (cache.get_cache_key('site/index.html', filename)
+                != cache.get_cache_key(override, filename))
+
+    def test_get_stable_path(self, tmpdir, monkeypatch):
+        root = str(tmpdir)
+        nested = str(tmpdir.mkdir('lib'))
+        monkeypatch.setattr('sys.path', [root, nested])
+        assert get_stable_path(os.path.join(nested, 'pkg', 'a.html')) == \
+            'pkg/a.html'
+        assert get_stable_path('/elsewhere/a.html') == '/elsewhere/a.html'
+
+    def test_configured_after_init_app(self, tmpdir):
+        from flask_controller_bundle import FlaskControllerBundle
+        cache_dir = os.path.join(str(tmpdir), 'bytecode')
+        app = Flask('tests', template_folder=os.path.join(
+            os.path.dirname(__file__), 'templates'))
+        app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = cache_dir
+        FlaskControllerBundle.before_init_app(app)
+        FlaskControllerBundle.after_init_app(app)
+        assert isinstance(app.jinja_env.bytecode_cache, UnchainedBytecodeCache)
+
+        app.jinja_env.get_template('site/index.html')
+        assert os.listdir(cache_dir)
+
+
+class TestPrecompileTemplates:
+    def test_compiles_referenced_override_depths(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        write_template(app_folder, 'layout.html',
+                       '{% extends "layout.html" %}')
+        write_template(one, 'layout.html', '{% extends "layout.html" %}')
+        write_template(two, 'layout.html', 'base {% block body %}{% endblock %}')
+        write_template(two, 'site/index.html', '{% extends "layout.html" %}')
+        write_template(two, 'site/broken.html', '{% if %}')
+        env = loader_app.jinja_env
+        loader_app.jinja_env.loader.build_index()
+
+        compiled, errors = precompile_templates(env)
+        assert compiled == ['layout.html', 'layout.html__1__',
+                            'layout.html__2__', 'site/index.html']
+        assert [name for name, error in errors] == ['site/broken.html']
+        assert isinstance(errors[0][1], TemplateSyntaxError)
+
+    def test_skips_non_template_files(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        write_template(one, 'index.html', 'one')
+        for name in ('.DS_Store', 'img/logo.png', 'binary.html'):
+            write_binary(one, name, b'\x00\x89PNG\xff\xfe')
+        loader_app.jinja_env.loader.build_index()
+
+        compiled, errors = precompile_templates(loader_app.jinja_env)
+        assert compiled == ['index.html']
+        assert [name for name, error in errors] == ['binary.html']
+        assert isinstance(errors[0][1], UnicodeDecodeError)
+
+    def test_command(self, loader_app, tmpdir):
+        app_folder, one, two = loader_app.folders
+        write_template(app_folder, 'site/index.html',
+                       '{% extends "site/index.html" %}')
+        write_template(one, 'site/index.html', 'one')
+        write_binary(one, '.DS_Store', b'\x00\x00\x00\x01Bud1\xff')
+        loader_app.jinja_env.loader.build_index()
+        output = os.path.join(str(tmpdir), 'bytecode')
+
+        runner = loader_app.test_cli_runner()
+        result = runner.invoke(precompile_templates_command,
+                               ['--output', output])
+        assert result.exit_code == 0
+        assert 'Compiled 2 templates.' in result.output
+        assert len(os.listdir(output)) == 2
+
+        write_template(two, 'site/broken.html', '{% if %}')
+        loader_app.jinja_env.loader.build_index()
+        result = runner.invoke(precompile_templates_command,
+                               ['--output', output])
+        assert result.exit_code == 1
+        assert 'site/broken.html' in result.output
+
+
+@pytest.mark.parametrize('depth,expected', [
+    (0, '1st'), (1, '2nd'), (2, '3rd'), (3, '4th'), (10, '11th'),
+    (11, '12th'), (12, '13th'), (20, '21st'), (21, '22nd'), (110, '111th'),
+])
+def test_pretty_num(depth, expected):
+    assert pretty_num(depth) == expected
+
+
+class TestSampledExplanations:
+    def test_records_structured_entries(self, loader_app):
+        app_folder, one, two = loader_app.folders
+        write_template(one, 'site/index.html', 'one')
+        write_template(two, 'site/index.html', 'two')
+        loader_app.config['EXPLAIN_TEMPLATE_LOADING'] = True
+        loader_app.config['EXPLAIN_TEMPLATE_LOADING_SAMPLE_RATE'] = 1.0
+        loader = loader_app.jinja_env.loader
+        env = loader_app.jinja_env
+
+        override = make_template_override('site/index.html', 0)
+        assert loader.get_source(env, override)[0] == 'two'
+        with pytest.raises(TemplateNotFound):
+            loader.get_source(env, 'site/missing.html')
+
+        dump = get_template_loading_explanations(loader_app).dump()
+        assert dump['templates'] == {override: 1, 'site/missing.html': 1}
+        assert dump['sources'] == {
+            'blueprint "two" (tests.test_template_loader)': 1}
+        assert dump['not_found'] == {'site/missing.html': 1}
+
+        entry = dump['entries'][0]
+        assert entry['template'] == 'site/index.html'
+        assert entry['depth'] == 1
+        assert entry['filename'] == os.path.join(two, 'site', 'index.html')
+        assert [attempt['action'] for attempt in entry['attempts']] == [
+            'no match', 'skipping', 'using']
+
+    def test_buffer_is_bounded(self, loader_app):
+        write_template(loader_app.folders[1], 'site/index.html', 'one')
+        loader_app.config['EXPLAIN_TEMPLATE_LOADING'] = True
+        loader_app.config['EXPLAIN_TEMPLATE_LOADING_SAMPLE_RATE'] = 1.0
+        loader_app.config['EXPLAIN_TEMPLATE_LOADING_BUFFER_SIZE'] = 3
+        loader = loader_app.jinja_env.loader
+
+        for _ in range(5):
+            loader.get_source(loader_app.jinja_env, 'site/index.html')
+        explanations = get_template_loading_explanations(loader_app)
+        assert len(explanations.entries) == 3
+        assert explanations.templates['site/index.html'] == 5
+        assert len(explanations.dump(limit=1)['entries']) == 1
+
+        explanations.clear()
+        assert explanations.dump()['entries'] == []
+
+    def test_unsampled_loads_are_not_recorded(self, loader_app):
+        write_template(loader_app.folders[1], 'site/index.html', 'one')
+        loader_app.config['EXPLAIN_TEMPLATE_LOADING'] = True
+        loader_app.config['EXPLAIN_TEMPLATE_LOADING_SAMPLE_RATE'] = 0
+        loader = loader_app.jinja_env.loader
+
+        assert loader.get_source(loader_app.jinja_env,
+                                 'site/index.html')[0] == 'one'
+        assert not get_template_loading_explanations(loader_app).entries
@@ -0,0 +1,106 @@
+import json
+import pytest
+
+from flask_controller_bundle.commands import timings as timings_command
+from flask_controller_bundle.constants import TIMINGS_EXTENSION_NAME
+from flask_controller_bundle.hooks import RegisterRoutesHook, Store
+from flask_controller_bundle.routes import include
+from flask_controller_bundle.timing import (
+    StartupTimings, get_startup_timings, recording_module_timings,
+    timed_module)
+from flask_unchained.unchained import Unchained
+
+from .fixtures.auto_route_app_bundle import AutoRouteAppBundle
+from .fixtures.vendor_bundle import VendorBundle
+
+
+class TestStartupTimings:
+    def test_it_accumulates_timings(self):
+        timings = StartupTimings()
+        timings.add('routes', 'import', 0.5, 'app')
+        timings.add('routes', 'import', 0.25, 'app')
+        timings.add('routes', 'import', 1.0, 'vendor')
+        timings.add('routes', 'normalize', 0.25)
+
+        assert timings.phases == {('routes', 'import'): 1.75,
+                                  ('routes', 'normalize'): 0.25}
+        assert timings.total == 2.0
+        assert timings.slowest() == [('routes', 'import', 'vendor', 1.0),
+                                     ('routes', 'import', 'app', 0.75)]
+        assert timings.slowest(1) == [('routes', 'import', 'vendor', 1.0)]
+
+    def test_timed(self):
+        timings = StartupTimings()
+        with pytest.raises(ValueError):
+            with timings.timed('routes', 'collect', 'app'):
+                raise ValueError
+        assert timings.phases[('routes', 'collect')] > 0
+        assert timings.slowest()[0][:3] == ('routes', 'collect', 'app')
+
+    def test_timed_module_excludes_nested_modules(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr('time.perf_counter', lambda: now[0])
+
+        timings = StartupTimings()
+        with timed_module('collect', 'ignored'):
+            now[0] += 1  # not recording
+        with recording_module_timings(timings, 'routes'):
+            with timed_module('collect', 'outer'):
+                now[0] += 1
+                with timed_module('import', 'inner'):
+                    now[0] += 2
+                with timed_module('collect', 'inner'):
+                    now[0] += 4
+
+        assert timings.phases == {('routes', 'collect'): 5.0,
+                                  ('routes', 'import'): 2.0}
+        assert timings.slowest() == [('routes', 'collect', 'inner', 4.0),
+                                     ('routes', 'import', 'inner', 2.0),
+                                     ('routes', 'collect', 'outer', 1.0)]
+
+    def test_get_startup_timings(self, app):
+        timings = get_startup_timings(app)
+        assert isinstance(timings, StartupTimings)
+        assert get_startup_timings(app) is timings
+        assert app.extensions[TIMINGS_EXTENSION_NAME] is timings
+
+
+class TestHookTimings:
+    def test_routes_hook_records_phases(self, app):
+        app.extensions.pop(TIMINGS_EXTENSION_NAME, None)
+        hook = RegisterRoutesHook(Unchained(), Store())
+        with app.test_request_context():
+            hook.run_hook(app, [VendorBundle, AutoRouteAppBundle])
+
+        timings = get_startup_timings(app)
+        phases = {phase for hook_name, phase in timings.phases}
+        assert {'import', 'collect', 'normalize', 'should_register',
+                'validate'}.issubset(phases)
+
+    def test_include_records_module_timings(self):
+        timings = StartupTimings()
+        with recording_module_timings(timings, 'routes'):
+            routes = list(include('tests.fixtures.other_routes',
+                                  attr='recursive', reload=True))
+        assert len(routes) == 6
+
+        assert {phase for hook_name, phase in timings.phases} == {
+            'import', 'collect'}
+        assert {(phase, key) for hook_name, phase, key in timings.keys} == {
+            ('import', 'tests.fixtures.other_routes'),
+            ('collect', 'tests.fixtures.other_routes')}
+
+    def test_timings_command(self, app):
+        timings = get_startup_timings(app)
+        timings.add('routes', 'add_url_rule', 0.5, 'tests.fixtures.views')
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(timings_command, ['--json'])
+        data = json.loads(result.output)
+        assert data['total'] >= 0.5
+        assert {'hook': 'routes', 'phase': 'add_url_rule',
+                'key': 'tests.fixtures.views', 'seconds': 0.5} in data['slowest']
+
+        result = runner.invoke(timings_command)
+        assert 'Startup Timings' in result.output
+        assert 'tests.fixtures.views' in result.output
@@ -0,0 +1,104 @@
+import pytest
+
+from flask import url_for as flask_url_for
+from werkzeug.routing import BuildError
+
+from flask_controller_bundle import url_for_many
+from flask_controller_bundle.url_builder import (
+    build_url, compile_url_builder, get_url_builder)
+
+
+@pytest.fixture()
+def rules(app):
+    app.add_url_rule('/', endpoint='index')
+    app.add_url_rule('/users/<int:id>', endpoint='users.get')
+    app.add_url_rule('/tags/<tag>/posts', endpoint='tags.posts')
+    app.add_url_rule('/files/<path:filename>', endpoint='files')
+    app.add_url_rule('/page/<int:page>', endpoint='pages',
+                     defaults={'page': 1})
+    app.add_url_rule('/a-rule', endpoint='multiple', methods=['GET'])
+    app.add_url_rule('/another-rule', endpoint='multiple', methods=['POST'])
+    return app
+
+
+class TestCompileUrlBuilder:
+    def test_it_compiles_simple_rules(self, rules):
+        for endpoint in ['index', 'users.get', 'tags.posts', 'files']:
+            rule = rules.url_map._rules_by_endpoint[endpoint][0]
+            assert compile_url_builder(rule, rules.url_map) is not None
+
+    def test_it_does_not_compile_rules_with_defaults(self, rules):
+        rule = rules.url_map._rules_by_endpoint['pages'][0]
+        assert compile_url_builder(rule, rules.url_map) is None
+
+    def test_it_compiles_rules_with_converter_arguments(self, app):
+        app.add_url_rule('/<int(fixed_digits=4):year>', endpoint='year')
+        rule = app.url_map._rules_by_endpoint['year'][0]
+        assert compile_url_builder(rule, app.url_map) is not None
+
+        with app.test_request_context():
+            assert build_url('year', {'year': 42}) == '/0042'
+
+
+class TestGetUrlBuilder:
+    def test_it_caches_builders(self, rules):
+        assert get_url_builder('users.get') is get_url_builder('users.get')
+
+    def test_it_returns_none_for_unknown_or_ambiguous_endpoints(self, rules):
+        assert get_url_builder('fail') is None
+        assert get_url_builder('multiple') is None
+
+
+class TestBuildUrl:
+    @pytest.mark.parametrize('endpoint,values', [
+        ('index', {}),
+        ('users.get', {'id': 42}),
+        ('tags.posts', {'tag': 'hello world/ü'}),
+        ('files', {'filename': 'some/dir/file name.txt'}),
+    ])
+    def test_it_builds_the_same_urls_as_flask(self, rules, endpoint, values):
+        with rules.test_request_context():
+            assert build_url(endpoint, dict(values)) == \
+                flask_url_for(endpoint, **values)
+
+    def test_it_respects_the_script_root(self, rules):
+        with rules.test_request_context(base_url='http://localhost/app/'):
+            assert build_url('users.get', {'id': 1}) == '/app/users/1'
+
+    def test_it_falls_back_for_anything_it_cannot_handle(self, rules):
+        with rules.test_request_context():
+            assert build_url('users.get', {'id': 1, 'q': 'query'}) is None
+            assert build_url('users.get', {}) is None
+            assert build_url('users.get', {'id': 1, '_anchor': 'a'}) is None
+            assert build_url('users.get', {'id': 1, '_external': True}) is None
+            assert build_url('pages', {}) is None
+            assert build_url('multiple', {}) is None
+
+
+class TestUrlForMany:
+    def test_it_works(self, rules):
+        with rules.test_request_context():
+            assert url_for_many('users.get', [{'id': 1}, {'id': 2}]) == \
+                ['/users/1', '/users/2']
+
+    def test_it_falls_back_to_flask(self, rules):
+        with rules.test_request_context():
+            assert url_for_many('users.get', [{'id': 1}, {'id': 2}],
+                                q='query') == ['/users/1?q=query',
+                                               '/users/2?q=query']
+            assert url_for_many('pages', [{}, {}]) == ['/page/1', '/page/1']
+
+    def test_it_works_with_external_host(self, rules):
+        with rules.test_request_context():
+            assert url_for_many('users.get', [{'id': 1}],
+                                _external_host='example.com') == \
+                ['http://example.com/users/1']
+
+    def test_it_works_with_urls(self, rules):
+        with rules.test_request_context():
+            assert url_for_many('/foobar', [{}, {}]) == ['/foobar', '/foobar']
+
+    def test_it_raises_build_errors(self, rules):
+        with rules.test_request_context():
+            with pytest.raises(BuildError):
+                url_for_many('fail', [{'id': 1}])
@@ -3,9 +3,14 @@ import pytest
 from werkzeug.routing import BuildError
 
 from flask_controller_bundle import Controller, Resource
+from flask_controller_bundle.attr_constants import REMOVE_SUFFIXES_ATTR
+from flask_controller_bundle.constants import EXTENSION_NAME
+from flask_controller_bundle.hooks import Store
 from flask_controller_bundle.utils import (
-    controller_name, get_param_tuples, get_last_param_name, join,
-    method_name_to_url, url_for, _validate_redirect_url)
+    build_redirect_allowlist, controller_name, get_param_tuples,
+    get_last_param_name, join, method_name_to_url, parallel_map, url_for,
+    url_for_many,
+    _validate_redirect_url)
 from flask_unchained.utils import deep_getattr
 
 
@@ -76,6 +81,26 @@ class TestControllerName:
             pass
         assert controller_name(SomeCtrl) == 'some_ctrl'
 
+    def test_it_caches_names_per_class(self):
+        class UserResource(Resource):
+            pass
+
+        class AdminUserResource(UserResource):
+            pass
+
+        assert controller_name(UserResource) == 'user'
+        assert controller_name(AdminUserResource) == 'admin_user'
+        assert UserResource.url_prefix == '/users'
+        assert AdminUserResource.url_prefix == '/admin_users'
+
+        UserResource.__name__ = 'RoleResource'
+        assert controller_name(UserResource) == 'role'
+        assert UserResource.url_prefix == '/roles'
+
+        setattr(UserResource, REMOVE_SUFFIXES_ATTR, ['UserResource'])
+        assert controller_name(AdminUserResource) == 'admin'
+        assert AdminUserResource.url_prefix == '/admins'
+
 
 class TestGetParamTuples:
     def test_it_works(self):
@@ -155,6 +180,43 @@ class TestUrlFor:
             app.add_url_rule('/foo/<string:slug>', endpoint='some.endpoint')
             assert url_for('some.endpoint', slug='hi') == '/foo/hi'
 
+    def test_it_uses_the_controller_endpoints_index(self, app):
+        class SiteController(Controller):
+            def about_us(self):
+                pass
+
+        store = Store()
+        store.controller_endpoints[(SiteController, 'about_us')] = 'custom.about'
+        app.extensions[EXTENSION_NAME] = store
+
+        with app.test_request_context():
+            app.add_url_rule('/about', endpoint='custom.about')
+            assert url_for('about_us', _cls=SiteController) == '/about'
+            assert url_for('about_us', _cls=SiteController()) == '/about'
+
+    def test_it_falls_through_if_class_endpoint_not_registered(self, app):
+        class SiteController(Controller):
+            def about_us(self):
+                pass
+
+        with app.test_request_context():
+            app.add_url_rule('/about-us', endpoint='about_us')
+            assert url_for('about_us', _cls=SiteController) == '/about-us'
+
+    def test_it_falls_through_if_class_endpoint_fails_to_build(self, app):
+        class SiteController(Controller):
+            def index(self, id):
+                pass
+
+        with app.test_request_context():
+            app.add_url_rule('/sites/<int:id>',
+                             endpoint='site_controller.index')
+            app.add_url_rule('/', endpoint='index')
+            assert url_for('index', _cls=SiteController) == '/'
+            assert url_for('index', id=1, _cls=SiteController) == '/sites/1'
+            assert url_for_many('index', [{}, {'id': 2}],
+                                _cls=SiteController) == ['/', '/sites/2']
+
     def test_it_falls_through_if_class_endpoint_not_found(self, app):
         class SiteResource(Resource):
             def get(self, id):
@@ -202,28 +264,72 @@ class TestMethodNameToUrl:
         assert method_name_to_url('_FooBar_baz-booFoo_') == '/foo-bar-baz-boo-foo'
 
 
+class TestBuildRedirectAllowlist:
+    def test_it_works(self):
+        assert build_redirect_allowlist({}) == set()
+        assert build_redirect_allowlist({
+            'EXTERNAL_SERVER_NAME': 'https://example.com:8888/',
+            'REDIRECT_ALLOWED_HOSTS': ['localhost:5000', 'http://foo.com'],
+        }) == {'example.com:8888', 'localhost:5000', 'foo.com'}
+
+
 class TestValidateRedirectUrl:
     def test_it_fails_on_garbage(self):
         assert _validate_redirect_url(None) is False
         assert _validate_redirect_url(' ') is False
 
-    def test_it_fails_with_invalid_netloc(self, app, monkeypatch):
-        with app.test_request_context():
-            monkeypatch.setattr('flask.request.host_url', 'http://example.com')
+    def test_it_fails_with_invalid_netloc(self, app):
+        with app.test_request_context(base_url='http://example.com'):
             assert _validate_redirect_url('http://fail.com') is False
-            monkeypatch.undo()
+            assert _validate_redirect_url('http://example.com') is True
 
     @pytest.mark.options(EXTERNAL_SERVER_NAME='works.com')
-    def test_it_works_with_external_server_name(self, app, monkeypatch):
-        with app.test_request_context():
-            monkeypatch.setattr('flask.request.host_url', 'http://example.com')
+    def test_it_works_with_external_server_name(self, app):
+        with app.test_request_context(base_url='http://example.com'):
             assert _validate_redirect_url('http://works.com') is True
-            monkeypatch.undo()
+            assert _validate_redirect_url('http://fail.com') is False
+
+    @pytest.mark.options(EXTERNAL_SERVER_NAME='works.com')
+    def test_it_matches_external_hosts_exactly(self, app, monkeypatch):
+        with app.test_request_context():
+            assert _validate_redirect_url('http://orks.com') is False
+            assert _validate_redirect_url('http://www.works.com') is False
 
-    def test_it_works_with_explicit_external_host(self, app, monkeypatch):
+    @pytest.mark.options(REDIRECT_ALLOWED_HOSTS=['one.com', 'https://two.com'])
+    def test_it_works_with_allowed_hosts(self, app, monkeypatch):
         with app.test_request_context():
-            monkeypatch.setattr('flask.request.host_url', 'http://example.com')
+            assert _validate_redirect_url('http://one.com/path') is True
+            assert _validate_redirect_url('https://two.com') is True
+            assert _validate_redirect_url('https://three.com') is False
+
+    def test_it_works_with_the_request_host(self, app):
+        with app.test_request_context(base_url='http://example.com'):
+            assert _validate_redirect_url('http://example.com/path') is True
+            assert _validate_redirect_url('/path') is True
+
+    def test_it_works_with_explicit_external_host(self, app):
+        with app.test_request_context(base_url='http://example.com'):
             result = _validate_redirect_url('http://works.com',
                                             _external_host='works.com')
             assert result is True
-            monkeypatch.undo()
+            assert _validate_redirect_url('http://works.com') is False
+
+    def test_it_uses_the_allowlist_built_after_init_app(self, app):
+        from flask_controller_bundle import FlaskControllerBundle
+        app.config['EXTERNAL_SERVER_NAME'] = 'works.com'
+        FlaskControllerBundle.after_init_app(app)
+
+        # config changes after init don't affect the allowlist
+        app.config['REDIRECT_ALLOWED_HOSTS'] = ['later.com']
+        with app.test_request_context(base_url='http://example.com'):
+            assert _validate_redirect_url('http://works.com') is True
+            assert _validate_redirect_url('http://later.com') is False
+
+
+class TestParallelMap:
+    def test_it_keeps_the_order_of_items(self):
+        items = list(range(50))
+        assert parallel_map(lambda x: x * 2, items) == [x * 2 for x in items]
+        assert parallel_map(lambda x: x * 2, items, 8) == [x * 2 for x in items]
+        assert parallel_map(lambda x: x * 2, items, True) == \
+            [x * 2 for x in items]